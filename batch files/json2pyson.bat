@@ -0,0 +1 @@
+@python "%~dp0..\json2pyson.py" %*
\ No newline at end of file
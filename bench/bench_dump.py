@@ -0,0 +1,61 @@
+""" Counts the ``fp.write`` calls made by ``dump`` and times it, writing a
+20k-section document to a temporary file on disk.
+
+The buffered encoder (fragments joined every ``PySONEncoder.BUFFER_SIZE``)
+is compared with ``buffer_size=1``, which hands the output to ``fp.write``
+after every entry, close to the one write per fragment ``dump`` used to
+make. Each run does what ``dump`` does: write every chunk of the encoder.
+
+usage: python bench/bench_dump.py [SECTIONS]
+"""
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pyson.writer import make_encoder, PySONEncoder
+
+class CountingWriter:
+    def __init__(self, fp):
+        self.fp = fp
+        self.calls = 0
+
+    def write(self, string):
+        self.calls += 1
+        return self.fp.write(string)
+
+def document(sections):
+    return {f'sec{i}': {'name': f'item {i}', 'vals': [i*1.5, i, 'abc'*3], 'nested': {'a': [1, 2, 3], 'b': {'c': True}}}
+            for i in range(sections)}
+
+def run(obj, indent, buffer_size, repeat=3):
+    """ Returns ``(write calls, best time in seconds, output size)``. """
+    iterencode = make_encoder(indent=indent, buffer_size=buffer_size)
+    best = None
+    with tempfile.TemporaryDirectory() as directory:
+        name = os.path.join(directory, 'out.pyson')
+        for _ in range(repeat):
+            with open(name, 'w', encoding='utf-8') as file:
+                fp = CountingWriter(file)
+                start = time.perf_counter()
+                write = fp.write
+                for chunk in iterencode(obj):
+                    write(chunk)
+                elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return fp.calls, best, os.path.getsize(name)
+
+def main():
+    sections = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    obj = document(sections)
+    print(f'dump() of {sections} sections, best of 3')
+    for indent in (4, None):
+        calls, seconds, size = run(obj, indent, 1)
+        buffered_calls, buffered_seconds, buffered_size = run(obj, indent, PySONEncoder.BUFFER_SIZE)
+        assert size == buffered_size
+        print(f'indent={indent!s:5} unbuffered: {calls:>9,} writes {seconds:.3f}s   '
+              f'buffered: {buffered_calls:>5,} writes {buffered_seconds:.3f}s   ({size:,} bytes)')
+
+if __name__ == '__main__':
+    main()
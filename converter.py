@@ -0,0 +1,47 @@
+import sys
+import os.path as path
+
+def report_result(filename, newname, error, trace, log, verbose=True,
+                  stop_on_error=False, print_traceback=False, action='converting'):
+    """ Prints the result of converting ``filename`` (``'-'`` is standard
+    input) to ``log``: the ``error`` message (and its ``trace``) if there is
+    one, or the name of the new file. Returns False to stop converting.
+    """
+    if error is not None:
+        name = '<stdin>' if filename == '-' else path.basename(filename)
+        print(f"ERROR {action} file {name!r}:\n{error}", file=log)
+        if print_traceback:
+            print(trace, end='', file=log)
+        if stop_on_error:
+            if verbose:
+                print('Stopped process early', file=log)
+            return False
+        return True
+    if verbose:
+        print("Converted", path.basename(newname), file=log)
+    return True
+
+def run_jobs(job, files, args, jobs, report):
+    """ Calls ``job(filename, *args)`` for every file and passes the results
+    to ``report``, in the order of ``files``. With ``jobs > 1`` and several
+    files the jobs run in that many worker processes.
+
+    Stops as soon as ``report`` returns False, dropping the jobs which have
+    not started yet (on Python 3.9+; before that they finish first), and
+    returns False; returns True once every file has been reported.
+    """
+    if jobs == 1 or len(files) < 2:
+        for filename in files:
+            if not report(job(filename, *args)):
+                return False
+        return True
+    from concurrent.futures import ProcessPoolExecutor
+    chunksize = max(1, min(64, len(files) // (jobs*4)))
+    with ProcessPoolExecutor(jobs) as executor:
+        results = executor.map(job, files, *([arg]*len(files) for arg in args), chunksize=chunksize)
+        for result in results:
+            if not report(result):
+                if sys.version_info >= (3, 9):
+                    executor.shutdown(wait=True, cancel_futures=True)
+                return False
+    return True
@@ -0,0 +1,217 @@
+import json
+import io
+import os
+import re
+import sys
+import os.path as path
+import argparse
+from json.decoder import scanstring
+from pyson.writer import PySONEncoder
+from converter import report_result, run_jobs
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+NUMBER_CHARS = frozenset('0123456789.eE+-')
+
+def iter_members(stream, chunk_size=2**16):
+    """ Yields the ``(key, value)`` members of the JSON object read from
+    ``stream`` (a text file) one at a time, reading ``chunk_size``
+    characters at a time, so only one top-level value is in memory at once.
+
+    Raises ``ValueError`` if the document is not an object or repeats a
+    top-level key (which can not be taken back once it has been yielded).
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+
+    def read(size=chunk_size):
+        nonlocal buffer, pos, eof
+        chunk = stream.read(size)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def next_char():
+        """ Skips whitespace; returns the next character ('' at the end). """
+        nonlocal pos
+        while True:
+            pos = WHITESPACE.match(buffer, pos).end()
+            if pos < len(buffer) or eof:
+                return buffer[pos:pos+1]
+            read()
+
+    def decode(parse):
+        """ Calls ``parse(pos)``, reading more until a value is complete (a
+        number cut off by the end of the buffer may not be). Reads grow with
+        the value, so a large one is not parsed again for every chunk.
+        """
+        nonlocal pos
+        while True:
+            try:
+                value, end = parse(pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                if eof or end < len(buffer) and buffer[end] not in NUMBER_CHARS:
+                    pos = end
+                    return value
+            read(max(chunk_size, len(buffer) - pos))
+
+    if next_char() != '{':
+        raise ValueError("the top-level JSON value must be an object")
+    pos += 1
+    keys = set()
+    char = next_char()
+    if char == '}':
+        pos += 1
+    while char != '}':
+        if char != '"':
+            raise ValueError(f"expected a key, got {char!r}")
+        key = decode(lambda start: scanstring(buffer, start + 1))
+        if key in keys:
+            raise ValueError(f"duplicate key {key!r}")
+        keys.add(key)
+        if next_char() != ':':
+            raise ValueError(f"expected ':' after the key {key!r}")
+        pos += 1
+        next_char()
+        yield key, decode(lambda start: decoder.raw_decode(buffer, start))
+        char = next_char()
+        pos += 1
+        if char == ',':
+            char = next_char()
+            if char == '}':
+                raise ValueError("expected a key after ',', got '}'")
+        elif char != '}':
+            raise ValueError(f"expected ',' or '}}' after the value of {key!r}, got {char!r}")
+    if next_char():
+        raise ValueError("extra data after the top-level object")
+
+def transcode(infile, outfile, layout='block', indent=4):
+    """ Converts the JSON object read from ``infile`` (a text file) to a
+    PySON document written to ``outfile`` (anything with a ``write`` method
+    which takes strings).
+
+    Every top-level member is encoded as soon as it has been read, and then
+    dropped. With the ``'block'`` layout nested objects are written as
+    indented sections, with ``'brace'`` between braces.
+    """
+    encoder = PySONEncoder(indent=indent, python_constants=True, sections=layout == 'block')
+    write = outfile.write
+    for key, value in iter_members(infile):
+        for chunk in encoder.iterencode({key: value}):
+            write(chunk)
+        write('\n')
+
+def output_name(filename):
+    return path.splitext(filename)[0] + '.pyson'
+
+def convert_file(filename, layout='block', indent=4):
+    """ Converts the JSON file ``filename`` to a PySON file next to it and
+    returns the name of the PySON file, which is only replaced once the
+    whole input has been converted.
+    """
+    newname = output_name(filename)
+    tempname = newname + '.tmp'
+    try:
+        with open(filename, 'r', encoding='utf-8') as file, open(tempname, 'w', encoding='utf-8') as output:
+            transcode(file, output, layout, indent)
+    except BaseException:
+        if path.exists(tempname):
+            os.remove(tempname)
+        raise
+    os.replace(tempname, newname)
+    return newname
+
+def _convert_job(filename, layout, indent):
+    """ Runs ``convert_file`` (in a worker process), or converts standard
+    input to standard output for ``'-'``. Returns ``(filename, newname,
+    error message, traceback)``.
+    """
+    try:
+        if filename == '-':
+            stdin = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+            transcode(stdin, sys.stdout, layout, indent)
+            sys.stdout.flush()
+            newname = '<stdout>'
+        else:
+            newname = convert_file(filename, layout, indent)
+    except ValueError as e:
+        import traceback
+        return filename, None, f"JSON syntax error: {e}", traceback.format_exc()
+    except OSError as e:
+        import traceback
+        return filename, None, str(e), traceback.format_exc()
+    return filename, newname, None, None
+
+def main(args=None):
+    """usage: json2pyson.py [-h] [-quiet] [--stop-on-error] [--print-traceback]
+                     [-j N] [--layout {block,brace}] [--indent N]
+                     FILE [FILE ...]
+
+    Convert a JSON file to a PySON file
+
+    positional arguments:
+      FILE                  The files to convert; - is standard input, which is
+                            converted to standard output
+
+    optional arguments:
+      -h, --help            show this help message and exit
+      -quiet                Don't print extra information while converting
+                            files
+      --stop-on-error       Halt execution upon errors instead of skipping the
+                            file
+      --print-traceback     Print full traceback on error
+      -j N, --jobs N        Convert N files at a time in separate processes
+      --layout {block,brace}
+                            Write nested objects as indented sections (block,
+                            the default) or between braces (brace)
+      --indent N            The number of spaces per indentation level
+                            (default: 4)
+    """
+    parser = argparse.ArgumentParser(description='Convert a JSON file to a PySON file')
+    parser.add_argument('files', metavar='FILE', nargs='+',
+                        help='The files to convert; - is standard input, which is converted to standard output')
+    parser.add_argument('-quiet', action='store_true',
+                        help="Don't print extra information while converting files")
+    parser.add_argument('--stop-on-error', dest='stop_on_error', action='store_true',
+                        help='Halt execution upon errors instead of skipping the file')
+    parser.add_argument('--print-traceback', dest='print_traceback', action='store_true',
+                        help='Print full traceback on error')
+    parser.add_argument('-j', '--jobs', metavar='N', type=int, default=1,
+                        help='Convert N files at a time in separate processes')
+    parser.add_argument('--layout', choices=('block', 'brace'), default='block',
+                        help='Write nested objects as indented sections (block, the default) or between braces (brace)')
+    parser.add_argument('--indent', metavar='N', type=int, default=4,
+                        help='The number of spaces per indentation level (default: 4)')
+
+    args: argparse.Namespace = parser.parse_args(args)
+
+    verbose: bool = not args.quiet
+    stop_on_error: bool = args.stop_on_error
+    print_traceback: bool = args.print_traceback
+    jobs: int = max(1, args.jobs)
+    # Top-level entries are only written one per line with some indentation.
+    indent: int = max(1, args.indent)
+    files = args.files
+    # Standard output is reserved for the PySON as soon as it is used.
+    log = sys.stderr if '-' in files else sys.stdout
+
+    for filename in files:
+        if filename != '-' and not path.isfile(filename):
+            print('ERROR: file not found:', filename, file=log)
+            exit(1)
+
+    def report(result):
+        """ Prints the result of one conversion; returns False to stop. """
+        return report_result(*result, log, verbose, stop_on_error, print_traceback)
+
+    # Standard input is converted in this process.
+    ok = run_jobs(_convert_job, files, (args.layout, indent), 1 if '-' in files else jobs, report)
+    if not ok:
+        exit(1)
+
+if __name__ == "__main__":
+    main()
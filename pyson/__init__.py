@@ -1,2 +1,5 @@
-from .parser import loadx, load, loads, DataParseError
-from .writer import dump, dumps
\ No newline at end of file
+from .parser import loadx, load, loads, iter_load, load_all, aload, aloads, Loader, Deferred, DataParseError
+from .writer import dump, dumps, dumpb, adump, make_encoder, canonical_dumps, digest
+from .diff import subtree_hashes, diff, patch, SubtreeHashes, Change
+from .watch import watch, Watcher
+from .lines import iter_lines, dump_lines, iter_lines_parallel
\ No newline at end of file
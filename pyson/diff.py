@@ -0,0 +1,172 @@
+import hashlib
+from typing import Any, NamedTuple, Optional, Tuple
+
+class SubtreeHashes(dict):
+    """ Maps the dotted path of every dict, list, tuple and set in a document
+    to a digest of its content, as built by ``subtree_hashes``. The path of
+    the document itself is ``''``; other paths are named like the references
+    of ``DataParser`` (``'server.ports.0'``).
+
+    Two containers with the same digest are equal. A path which names more
+    than one container (such as the key ``'a.b'`` next to the key ``'a'``
+    with a key ``'b'``) maps to ``None``, and is never taken as unchanged.
+    """
+
+    def __init__(self, digest_size=16):
+        self.digest_size = digest_size
+
+    @property
+    def root(self) -> Optional[bytes]:
+        return self.get('')
+
+class Change(NamedTuple):
+    """ A difference between two documents, as found by ``diff``. """
+    kind: str # 'added', 'removed' or 'changed'
+    keys: Tuple # the keys and indices leading to the value, from the top
+    old: Any # the old value (None if added)
+    new: Any # the new value (None if removed)
+
+    @property
+    def path(self) -> str:
+        return '.'.join(map(str, self.keys))
+
+def subtree_hashes(obj, digest_size=16) -> SubtreeHashes:
+    """ Computes a digest of every container in ``obj`` bottom-up, each from
+    the digests of its children, in one pass over the document.
+
+    Dicts and sets hash the same whatever the order of their entries.
+    Scalars are hashed by type and ``repr``, so objects whose ``repr``
+    includes their address count as changed every time.
+    """
+    hashes = SubtreeHashes(digest_size)
+    _hash(obj, '', hashes, set())
+    return hashes
+
+def _leaf(value) -> bytes:
+    return f'{type(value).__name__}:{value!r}'.encode('utf-8', 'backslashreplace')
+
+def _hash(obj, path, hashes, ancestors) -> bytes:
+    if isinstance(obj, dict):
+        tag = b'd'
+    elif isinstance(obj, (list, tuple)):
+        tag = b'l'
+    elif isinstance(obj, (set, frozenset)):
+        tag = b's'
+    else:
+        return _leaf(obj)
+    if id(obj) in ancestors:
+        raise ValueError(f"circular reference at {path!r}")
+    ancestors.add(id(obj))
+    prefix = path + '.' if path else ''
+    if tag == b'd':
+        parts = sorted((_leaf(key), _hash(value, prefix + str(key), hashes, ancestors)) for key, value in obj.items())
+    elif tag == b'l':
+        parts = [(b'', _hash(value, prefix + str(i), hashes, ancestors)) for i, value in enumerate(obj)]
+    else:
+        # The elements of a set can not be named in a path.
+        scratch = SubtreeHashes(hashes.digest_size)
+        parts = sorted((b'', _hash(value, '', scratch, ancestors)) for value in obj)
+    ancestors.discard(id(obj))
+    digest = hashlib.blake2b(tag, digest_size=hashes.digest_size)
+    for key, value in parts:
+        digest.update(len(key).to_bytes(4, 'little'))
+        digest.update(key)
+        digest.update(len(value).to_bytes(4, 'little'))
+        digest.update(value)
+    result = b'#' + digest.digest()
+    if path in hashes:
+        hashes[path] = None
+    else:
+        hashes[path] = result
+    return result
+
+def diff(old, new, old_hashes: SubtreeHashes = None, new_hashes: SubtreeHashes = None) -> list:
+    """ Returns the ``Change``s which turn ``old`` into ``new``: added and
+    removed dict keys and list tails, and changed values.
+
+    Containers whose digests in ``old_hashes`` and ``new_hashes`` match are
+    skipped without being looked at, so once the hashes are known the time
+    taken grows with the size of the changes, not of the documents. Keep
+    the ``SubtreeHashes`` of a document around to compare it again later;
+    missing hashes are computed.
+    """
+    if old_hashes is None:
+        old_hashes = subtree_hashes(old)
+    if new_hashes is None:
+        new_hashes = subtree_hashes(new, old_hashes.digest_size)
+    changes = []
+    _diff(old, new, (), '', old_hashes, new_hashes, changes)
+    return changes
+
+def _diff(old, new, keys, path, old_hashes, new_hashes, changes):
+    if type(old) is not type(new):
+        changes.append(Change('changed', keys, old, new))
+        return
+    if isinstance(old, (dict, list, tuple)):
+        digest = old_hashes.get(path)
+        if digest is not None and digest == new_hashes.get(path):
+            return
+    prefix = path + '.' if path else ''
+    if isinstance(old, dict):
+        for key, value in old.items():
+            if key in new:
+                _diff(value, new[key], keys + (key,), prefix + str(key), old_hashes, new_hashes, changes)
+            else:
+                changes.append(Change('removed', keys + (key,), value, None))
+        for key, value in new.items():
+            if key not in old:
+                changes.append(Change('added', keys + (key,), None, value))
+    elif isinstance(old, list):
+        for i in range(min(len(old), len(new))):
+            _diff(old[i], new[i], keys + (i,), prefix + str(i), old_hashes, new_hashes, changes)
+        for i in range(len(new), len(old)):
+            changes.append(Change('removed', keys + (i,), old[i], None))
+        for i in range(len(old), len(new)):
+            changes.append(Change('added', keys + (i,), None, new[i]))
+    elif isinstance(old, tuple):
+        # Tuples can not be changed in place; a difference replaces them.
+        if len(old) != len(new) or any(_differs(a, b) for a, b in zip(old, new)):
+            changes.append(Change('changed', keys, old, new))
+    elif _differs(old, new):
+        changes.append(Change('changed', keys, old, new))
+
+def _differs(old, new) -> bool:
+    if type(old) is not type(new):
+        return True
+    if isinstance(old, float) and old != old:
+        return new == new # nan
+    if isinstance(old, (list, tuple)):
+        return len(old) != len(new) or any(_differs(a, b) for a, b in zip(old, new))
+    if isinstance(old, dict):
+        return old.keys() != new.keys() or any(_differs(value, new[key]) for key, value in old.items())
+    return old != new
+
+def patch(doc, changes):
+    """ Applies the ``Change``s returned by ``diff(doc, new)`` to ``doc`` in
+    place, so that it becomes equal to ``new`` while every dict and list
+    which did not change as a whole keeps its identity.
+
+    Returns the patched document, which is ``new`` itself only if the
+    top-level value was replaced.
+    """
+    removed = []
+    for change in changes:
+        if not change.keys:
+            return change.new
+        parent = doc
+        for key in change.keys[:-1]:
+            parent = parent[key]
+        key = change.keys[-1]
+        if change.kind == 'changed':
+            parent[key] = change.new
+        elif change.kind == 'added':
+            if isinstance(parent, list):
+                parent.append(change.new)
+            else:
+                parent[key] = change.new
+        else:
+            removed.append((parent, key))
+    # List tails are removed from the end, so the indices stay valid.
+    for parent, key in reversed(removed):
+        del parent[key]
+    return doc
@@ -0,0 +1,134 @@
+import io
+import os
+from collections import deque
+from .parser import DataParser, DataParseError
+from .tokenize import tokenize, TokenError, NEWLINE, ENDMARKER
+from .writer import _get_encoder
+
+def iter_lines(fp, allow_Infinity_and_NaN=True, python_constants=True):
+    """ Load PySON Lines from a file pointer opened in 'rb' (read-binary)
+    mode or a file name, yielding one value per line.
+
+    Every line holds one inline value (as written by ``dump_lines``); blank
+    lines and lines holding only a comment are skipped. Lines are parsed
+    one at a time, so the file never has to fit in memory.
+
+    ``python_constants`` must match the value given to ``dump_lines``.
+    """
+    if isinstance(fp, str):
+        with open(fp, 'rb') as file:
+            yield from _iter_lines(file, fp, 1, allow_Infinity_and_NaN, python_constants)
+    else:
+        yield from _iter_lines(fp, getattr(fp, 'name', '<unknown source>'), 1, allow_Infinity_and_NaN, python_constants)
+
+def _iter_lines(lines, filename, lineno, allow_Infinity_and_NaN, python_constants):
+    for lineno, line in enumerate(lines, lineno):
+        line = line.lstrip()
+        if not line or line.startswith(b'#'):
+            continue
+        tokens = tokenize(io.BytesIO(line).readline, yield_encoding=False, yield_comments=False)
+        try:
+            parser = DataParser(tokens, filename, allow_Infinity_and_NaN, python_constants)
+            value = parser.parse_inline_value()
+            parser.expect((NEWLINE, ENDMARKER))
+        except DataParseError as e:
+            raise DataParseError(e.msg, (filename, lineno, e.offset, e.text)) from None
+        except TokenError as e:
+            # Such as an unterminated triple-quoted string.
+            message, (_, offset) = e.args
+            raise DataParseError(message, (filename, lineno, offset, line.decode('utf-8', 'replace'))) from None
+        yield value
+
+def dump_lines(iterable, fp, skipkeys=False, check_circular=True,
+               default=None, sort_keys=False, python_constants=True):
+    """ Serialize every object of ``iterable`` as one line of inline PySON
+    to ``fp`` (a ``.write()``-supporting file-like object), which can be
+    read back with ``iter_lines``. The objects are written as they are
+    consumed, so a file opened in 'a' mode can be appended to.
+
+    Strings and bytes with line breaks are written with escapes instead of
+    as triple-quoted blocks, so every object stays on its own line.
+
+    See ``dump`` for the meaning of the other arguments.
+    """
+    encoder = _get_encoder(skipkeys, check_circular, None, default, sort_keys, python_constants, None, None, None, True, False, True)
+    write = fp.write
+    for obj in iterable:
+        write(''.join(encoder(obj)))
+        write('\n')
+
+def iter_lines_parallel(filename, allow_Infinity_and_NaN=True, python_constants=True, jobs=None, chunk_size=2**22):
+    """ Like ``iter_lines``, but parses the file named ``filename`` in
+    ``jobs`` worker processes (default: one per CPU).
+
+    The file is split into ranges of about ``chunk_size`` bytes which end
+    at a line break, so no line is cut in two; each worker reads and parses
+    its own range. Values are yielded in file order, and only a few ranges
+    are read ahead of the one being yielded.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    ranges = iter(_line_ranges(filename, chunk_size))
+    lineno = 1
+    executor = ProcessPoolExecutor(jobs)
+    pending = deque()
+    try:
+        def submit():
+            bounds = next(ranges, None)
+            if bounds is not None:
+                pending.append(executor.submit(_load_range, filename, *bounds, allow_Infinity_and_NaN, python_constants))
+        for _ in range(2*jobs):
+            submit()
+        while pending:
+            values, lines, error = pending.popleft().result()
+            submit()
+            if error is not None:
+                message, line, offset, text = error
+                raise DataParseError(message, (filename, lineno + line, offset, text))
+            yield from values
+            lineno += lines
+    finally:
+        # Drops the ranges which have not been started.
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+def _line_ranges(filename, chunk_size):
+    """ Returns the ``(start, end)`` byte offsets of the ranges of lines
+    ``iter_lines_parallel`` gives to the workers.
+    """
+    size = os.path.getsize(filename)
+    ranges = []
+    with open(filename, 'rb') as fp:
+        start = 0
+        while start < size:
+            end = start + max(1, chunk_size)
+            if end < size:
+                # Moves the end past the line break at or after it.
+                fp.seek(end - 1)
+                fp.readline()
+                end = fp.tell()
+            else:
+                end = size
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+def _load_range(filename, start, end, allow_Infinity_and_NaN, python_constants):
+    """ Parses the lines between the byte offsets ``start`` and ``end`` (in
+    a worker process). Returns ``(values, number of lines, error)``, where
+    the error is ``None`` or the message and position of a syntax error,
+    with the line number counted from the start of the range.
+    """
+    with open(filename, 'rb') as fp:
+        fp.seek(start)
+        data = fp.read(end - start)
+    lines = io.BytesIO(data).readlines()
+    values = []
+    try:
+        for value in _iter_lines(lines, filename, 0, allow_Infinity_and_NaN, python_constants):
+            values.append(value)
+    except DataParseError as e:
+        return None, len(lines), (e.msg, e.lineno, e.offset, e.text)
+    return values, len(lines), None
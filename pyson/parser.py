@@ -1,6 +1,13 @@
 import math
 import ast
+import operator
 import re
+import io
+import asyncio
+import builtins
+import copy
+import functools
+import threading
 from keyword import iskeyword
 from inspect import isgenerator, ismethod
 from typing import *
@@ -11,7 +18,9 @@ from collections import (
     OrderedDict,
     ChainMap
 )
+from collections.abc import MutableMapping
 from .tokenize import *
+from .tokenize import TokenError
 from .util import *
 
 class DataParseError(SyntaxError):
@@ -179,33 +188,172 @@ def load(fp, allow_Infinity_and_NaN=True):
 
     This method expects the file to have been opened in 'rb' (read-binary) mode, if the argument is a file pointer.
     """
+    return _get_loader(allow_Infinity_and_NaN).load(fp)
+
+def iter_load(fp, allow_Infinity_and_NaN=True):
+    """ Load PySON from a file pointer or file name one top-level entry at a
+    time, yielding ``(key, value)`` pairs as soon as each has been parsed.
+
+    Unless the document uses references, entries which have been yielded are
+    not kept; see ``DataParser.iter_items``.
+    """
     if isinstance(fp, str):
-        with open(fp, 'rb') as fp:
-            tokens = tokenize(fp.readline, yield_encoding=False, yield_comments=False)
+        with open(fp, 'rb') as file:
+            tokens = tokenize(file.readline, yield_encoding=False, yield_comments=False)
+            parser = DataParser(tokens, fp, allow_Infinity_and_NaN)
     else:
         tokens = tokenize(fp.readline, yield_encoding=False, yield_comments=False)
+        parser = DataParser(tokens, getattr(fp, 'name', '<unknown source>'), allow_Infinity_and_NaN)
+    yield from parser.iter_items()
 
-    return loadt(tokens, fp.name, allow_Infinity_and_NaN)
+DOCUMENT_SEPARATOR = b'---'
+"""bytes: A line holding only this separates the documents read by ``load_all``."""
 
-def loads(string, encoding='utf-8', allow_Infinity_and_NaN=True):
-    """ Load PySON from a string or a bytes-like object """
-    lines = iter(string.splitlines(keepends=True))
-    if isinstance(string, str):
-        def readline():
-            return bytes(next(lines), encoding)
-    elif isinstance(string, (bytes, bytearray)):
-        def readline():
-            return next(lines)
+def load_all(fp, allow_Infinity_and_NaN=True):
+    """ Load every document of a PySON stream from a file pointer opened in
+    'rb' (read-binary) mode or a file name, yielding them one at a time.
+
+    Documents are separated by lines holding only ``---`` (a ``---`` on the
+    first line is allowed, and starts the first document). Each document is
+    read and parsed only when the iterator gets to it, with its own
+    references and imports; the parser itself is set up once for the whole
+    stream.
+    """
+    if isinstance(fp, str):
+        with open(fp, 'rb') as file:
+            yield from _load_all(file, fp, allow_Infinity_and_NaN)
+    else:
+        yield from _load_all(fp, getattr(fp, 'name', '<unknown source>'), allow_Infinity_and_NaN)
+
+def _load_all(fp, filename, allow_Infinity_and_NaN):
+    line = fp.readline()
+    if not line:
+        return
+    pending = []
+    start = 1 # the line number of the first line of the document
+    if line.rstrip() == DOCUMENT_SEPARATOR:
+        start += 1
     else:
-        raise TypeError("loads() argument needs to be either a string or bytes object")
+        pending.append(line)
+    parser = None
+    while True:
+        lines = 0
+        separators = set() # the numbers of the lines which look like a separator
+        end = None # the number of the separator line which ends the document
 
-    tokens = tokenize(readline, yield_encoding=False, yield_comments=False)
+        def readline():
+            nonlocal lines
+            line = pending.pop() if pending else fp.readline()
+            if line:
+                lines += 1
+                if line.rstrip() == DOCUMENT_SEPARATOR:
+                    separators.add(lines)
+            return line
+
+        def split(tokens):
+            """ Ends the document at the first separator line which the tokenizer
+            reads as tokens, rather than as part of a multi-line string. The
+            tokenizer reads no further than that line.
+            """
+            nonlocal end
+            for token in tokens:
+                if token.type != DEDENT and token.start[1] == 0 and token.start[0] in separators:
+                    end = token.start[0]
+                    yield TokenInfo(ENDMARKER, '', token.start, token.start, '')
+                    return
+                yield token
+
+        tokens = split(tokenize(readline, yield_encoding=False, yield_comments=False))
+        try:
+            if parser is None:
+                parser = DataParser(tokens, filename, allow_Infinity_and_NaN)
+            else:
+                parser.reset(tokens)
+            document = parser.parse_all()
+        except DataParseError as e:
+            raise DataParseError(e.msg, (filename, e.lineno + start - 1, e.offset, e.text)) from None
+        except TokenError as e:
+            message, (row, offset) = e.args
+            raise DataParseError(message, (filename, row + start - 1, offset, '')) from None
+        yield document
+        if end is None:
+            return
+        start += end
 
-    return loadt(tokens, '<string>', allow_Infinity_and_NaN)
+def loads(string, encoding='utf-8', allow_Infinity_and_NaN=True):
+    """ Load PySON from a string or a bytes-like object """
+    return _get_loader(allow_Infinity_and_NaN).loads(string, encoding)
 
 def loadt(tokens, filename='<unknown source>', allow_Infinity_and_NaN=True):
     """ Load PySON from an iterable of TokenInfos (as returned by pycson.tokenize(yield_encoding=False, yield_comments=False)) """
-    return DataParser(tokens, filename, allow_Infinity_and_NaN).parse_all()
+    return _get_loader(allow_Infinity_and_NaN).loadt(tokens, filename)
+
+ASYNC_SLICE_SIZE = 4096
+"""int: The number of tokens ``aload`` and ``aloads`` read
+before yielding control back to the event loop.
+"""
+
+async def aload(fp, allow_Infinity_and_NaN=True, executor=None):
+    """ Asynchronously load PySON from a file name, an ``asyncio.StreamReader``
+    or a file pointer opened in 'rb' (read-binary) mode.
+
+    File names and file pointers are read in a worker thread, stream readers
+    are read until EOF, so the event loop is never blocked on I/O.
+
+    If ``executor`` is given (e.g. a ``concurrent.futures.ProcessPoolExecutor``
+    for CPU-heavy documents), the document is tokenized and parsed there.
+    Otherwise it is parsed on the event loop in bounded slices, yielding
+    control between top-level sections.
+    """
+    loop = asyncio.get_running_loop()
+    if isinstance(fp, str):
+        filename = fp
+        data = await loop.run_in_executor(None, _read_bytes, fp)
+    elif isinstance(fp, asyncio.StreamReader):
+        filename = '<stream>'
+        data = await fp.read()
+    else:
+        filename = getattr(fp, 'name', None)
+        if not isinstance(filename, str):
+            filename = '<unknown source>'
+        data = await loop.run_in_executor(None, fp.read)
+    return await _aload_bytes(data, filename, allow_Infinity_and_NaN, executor)
+
+async def aloads(string, encoding='utf-8', allow_Infinity_and_NaN=True, executor=None):
+    """ Asynchronously load PySON from a string or a bytes-like object.
+    See ``aload`` for the meaning of ``executor``.
+    """
+    if isinstance(string, str):
+        string = string.encode(encoding)
+    elif not isinstance(string, (bytes, bytearray)):
+        raise TypeError("aloads() argument needs to be either a string or bytes object")
+    return await _aload_bytes(bytes(string), '<string>', allow_Infinity_and_NaN, executor)
+
+def _read_bytes(filename):
+    with open(filename, 'rb') as fp:
+        return fp.read()
+
+def _load_bytes(data, filename, allow_Infinity_and_NaN):
+    tokens = tokenize(io.BytesIO(data).readline, yield_encoding=False, yield_comments=False)
+    return loadt(tokens, filename, allow_Infinity_and_NaN)
+
+async def _aload_bytes(data, filename, allow_Infinity_and_NaN, executor):
+    if executor is not None:
+        return await asyncio.get_running_loop().run_in_executor(executor, _load_bytes, data, filename, allow_Infinity_and_NaN)
+
+    tokens = []
+    for token in tokenize(io.BytesIO(data).readline, yield_encoding=False, yield_comments=False):
+        tokens.append(token)
+        if len(tokens) % ASYNC_SLICE_SIZE == 0:
+            await asyncio.sleep(0)
+
+    sections = DataParser(tokens, filename, allow_Infinity_and_NaN).iter_parse_all()
+    while True:
+        try:
+            next(sections)
+        except StopIteration as e:
+            return e.value
+        await asyncio.sleep(0)
     # token: TokenInfo = None
     # last: TokenInfo = None
     
@@ -708,6 +856,356 @@ def loadt(tokens, filename='<unknown source>', allow_Infinity_and_NaN=True):
 Value = Union[set, list, tuple, dict, str, int, float, complex, None]
 TokenTest = Union[str, int, Iterable[Union[str, int]]]
 
+class Loader:
+    """ A set of options for loading PySON, with everything ``DataParser`` derives
+    from them (the table of built-in types, the spellings of the constants)
+    computed once, instead of for every document. Use one to load many small
+    documents with the same options.
+
+    If ``memo_size`` is positive, the results of the factories in ``MEMOIZABLE``
+    (such as the classes made by ``namedtuple(...)``) are cached, for up to
+    ``memo_size`` different arguments, and shared by all the documents loaded.
+
+    If ``lazy`` is true, explicitly typed values (``sorted([...])``,
+    ``range(...)``, ``OrderedDict(...)``, ...) are loaded as ``Deferred``
+    values, whose constructor is only called when they are first used.
+
+    Loading only adds to the loader's caches, so it can be shared by threads.
+    """
+
+    def __init__(self, allow_Infinity_and_NaN=True, python_constants=True, allow_imports=True, memo_size=0, lazy=False):
+        self.allow_Infinity_and_NaN = allow_Infinity_and_NaN
+        self.python_constants = python_constants
+        self.allow_imports = allow_imports
+        self.memo_size = memo_size
+        self.lazy = lazy
+        self.types = {}
+        if python_constants:
+            inf, nan = 'inf', 'nan'
+            true, false, none = 'True', 'False', 'None'
+        else:
+            inf, nan = 'Infinity', 'NaN'
+            true, false, none = 'true', 'false', 'null'
+        ninf = '-' + inf
+        nnan = '-' + nan
+        pinf = '+' + inf
+        pnan = '+' + nan
+        inf = (inf, pinf)
+        nan = (nan, pnan)
+        self.parser_state = {
+            'allow_inf_nan': allow_Infinity_and_NaN,
+            'allow_imports': allow_imports,
+            'memo': _Memo(memo_size) if memo_size > 0 else None,
+            'lazy': lazy,
+            'builtin_types': {
+                'set': set,
+                'tuple': tuple,
+                'dict': dict,
+                'str': str,
+                'int': int,
+                'float': float,
+                'complex': complex,
+                'frozenset': frozenset,
+                'bytearray': bytearray,
+                'bytes': bytes,
+                'chr': chr,
+                'ord': ord,
+                'sorted': sorted,
+                'range': range,
+                'reversed': reversed,
+                'namedtuple': namedtuple,
+                'deque': deque,
+                'Counter': Counter,
+                'OrderedDict': OrderedDict
+            },
+            'true': true,
+            'false': false,
+            'none': none,
+            'inf': inf,
+            'nan': nan,
+            'ninf': ninf,
+            'nnan': nnan,
+            'infj': (*(x+'j' for x in inf), *(x+'J' for x in inf)),
+            'pinfj': (pinf + 'j', pinf + 'J'),
+            'nanj': (*(x+'j' for x in nan), *(x+'J' for x in nan)),
+            'pnanj': (pnan + 'j', pnan + 'J'),
+            'ninfj': (ninf + 'j', ninf + 'J'),
+            'nnanj': (nnan + 'j', nnan + 'J'),
+        }
+
+    def __repr__(self):
+        return f"{type(self).__name__}(allow_Infinity_and_NaN={self.allow_Infinity_and_NaN!r}, python_constants={self.python_constants!r}, allow_imports={self.allow_imports!r}, memo_size={self.memo_size!r}, lazy={self.lazy!r})"
+
+    def parser(self, tokens: Iterable[TokenInfo], filename='<unknown source>') -> 'DataParser':
+        return DataParser(tokens, filename, loader=self)
+
+    def loadt(self, tokens, filename='<unknown source>'):
+        """ Load PySON from an iterable of TokenInfos """
+        return self.parser(tokens, filename).parse_all()
+
+    def load(self, fp):
+        """ Load PySON from a file pointer or file name
+
+        This method expects the file to have been opened in 'rb' (read-binary) mode, if the argument is a file pointer.
+        """
+        if isinstance(fp, str):
+            with open(fp, 'rb') as file:
+                tokens = tokenize(file.readline, yield_encoding=False, yield_comments=False)
+                return self.loadt(tokens, fp)
+        tokens = tokenize(fp.readline, yield_encoding=False, yield_comments=False)
+        return self.loadt(tokens, getattr(fp, 'name', '<unknown source>'))
+
+    def loads(self, string, encoding='utf-8'):
+        """ Load PySON from a string or a bytes-like object """
+        lines = iter(string.splitlines(keepends=True))
+        if isinstance(string, str):
+            def readline():
+                return bytes(next(lines), encoding)
+        elif isinstance(string, (bytes, bytearray)):
+            def readline():
+                return next(lines)
+        else:
+            raise TypeError("loads() argument needs to be either a string or bytes object")
+
+        tokens = tokenize(readline, yield_encoding=False, yield_comments=False)
+        return self.loadt(tokens, '<string>')
+
+_get_loader = functools.lru_cache(maxsize=8)(Loader)
+
+MEMOIZABLE = (namedtuple, frozenset, range)
+"""tuple: The factories whose results a ``Loader`` with a ``memo_size`` caches.
+They must return the same (immutable) value for equal arguments.
+"""
+
+class _Memo:
+    """ A bounded cache of the results of the factories in ``MEMOIZABLE``, which
+    drops the least recently used result when it is full.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.results = OrderedDict()
+        self.lock = threading.Lock()
+
+    def call(self, factory, args, kwargs):
+        try:
+            key = (factory, _memo_key(args), _memo_key(kwargs))
+            hash(key)
+        except TypeError: # unhashable arguments
+            return factory(*args, **kwargs)
+        with self.lock:
+            if key in self.results:
+                self.results.move_to_end(key)
+                return self.results[key]
+        result = factory(*args, **kwargs)
+        with self.lock:
+            self.results[key] = result
+            if len(self.results) > self.size:
+                self.results.popitem(last=False)
+        return result
+
+def _memo_key(value):
+    """ A hashable stand-in for an argument, which only equals the stand-in of
+    an argument of the same type and value (so that ``1``, ``1.0`` and ``True``
+    do not share results). Floats are told apart by their ``repr``, so that
+    ``-0.0`` and ``0.0`` do not share results and ``nan`` matches itself.
+    """
+    if isinstance(value, (list, tuple)):
+        return (type(value), tuple(_memo_key(elem) for elem in value))
+    if isinstance(value, dict):
+        return (dict, tuple((_memo_key(key), _memo_key(elem)) for key, elem in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return (type(value), frozenset(_memo_key(elem) for elem in value))
+    if isinstance(value, (float, complex)):
+        return (type(value), repr(value))
+    return (type(value), value)
+
+class _LazyImport:
+    """ A module or name imported by a document, which is only imported when it
+    is first used. There is one per imported name for the whole process (see
+    ``_lazy_import``), so documents with the same imports share them.
+    """
+    __slots__ = ('package', 'name', 'value', 'resolved')
+
+    def __init__(self, package, name=None):
+        self.package = package
+        self.name = name
+        self.value = None
+        self.resolved = False
+
+    def resolve(self):
+        if not self.resolved:
+            if self.name is None:
+                self.value = __import__(self.package)
+            else:
+                self.value = getattr(__import__(self.package, fromlist=(self.name,)), self.name)
+            self.resolved = True
+        return self.value
+
+    def __str__(self):
+        if self.name is None:
+            return repr(self.package)
+        return repr(f"{self.package}.{self.name}")
+
+    def __repr__(self):
+        return f"<lazy import of {self}>"
+
+_lazy_imports = {}
+
+def _lazy_import(package, name=None) -> _LazyImport:
+    try:
+        return _lazy_imports[package, name]
+    except KeyError:
+        return _lazy_imports.setdefault((package, name), _LazyImport(package, name))
+
+def _construct(factory, args, kwargs, memo):
+    """ Calls the constructor of an explicitly typed value. Generators are read
+    into lists; other results (such as a ``range``) are kept as they are.
+    """
+    if memo is not None and factory in MEMOIZABLE:
+        result = memo.call(factory, args, kwargs)
+    else:
+        result = factory(*args, **kwargs)
+    if isgenerator(result):
+        result = list(result)
+    return result
+
+class Deferred:
+    """ An explicitly typed value loaded by a ``Loader`` with ``lazy=True``, whose
+    constructor is only called the first time the value is used, so values which
+    are never used cost nothing. Until then it holds the parsed arguments.
+
+    A ``Deferred`` stands for its value: comparisons, ``repr``, ``len``, iteration,
+    indexing, arithmetic, attribute access and ``isinstance`` all act on the value,
+    and ``dump`` writes the value. ``resolve()`` returns the value itself, while
+    ``copy.copy`` and ``copy.deepcopy`` return copies of it. If the constructor
+    fails, ``DataParseError`` is raised where the value is used, with the position
+    of the value in the document.
+
+    Each value has a lock of its own, held only while its constructor runs, so
+    values used from several threads are constructed once, without making the
+    constructors of other values wait.
+    """
+    __slots__ = ('_factory', '_args', '_kwargs', '_memo', '_at', '_value', '_lock')
+
+    def __init__(self, factory, args, kwargs, memo, at):
+        self._factory = factory
+        self._args = args
+        self._kwargs = kwargs
+        self._memo = memo
+        self._at = at
+        self._value = None
+        self._lock = threading.RLock()
+
+    def resolve(self):
+        # _value is set before _factory is cleared, so once _factory is None
+        # the value can be read without the lock.
+        if self._factory is not None:
+            with self._lock:
+                if self._factory is not None:
+                    try:
+                        self._value = _construct(self._factory, _force(self._args), _force(self._kwargs), self._memo)
+                    except Exception as e:
+                        raise DataParseError(f"exception raised from explicit type constructor", self._at) from e
+                    self._factory = self._args = self._kwargs = self._memo = None
+        return self._value
+
+    @property
+    def __class__(self):
+        return type(self.resolve())
+
+    def __getattr__(self, name):
+        return getattr(self.resolve(), name)
+
+    def __reduce__(self):
+        # Only used by pickle; copy uses __copy__ and __deepcopy__.
+        return _resolved, (self.resolve(),)
+
+    def __copy__(self):
+        return copy.copy(self.resolve())
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(self.resolve(), memo)
+
+    def __hash__(self):
+        return hash(self.resolve())
+
+    def __format__(self, format_spec):
+        return format(self.resolve(), format_spec)
+
+    def __setitem__(self, key, value):
+        self.resolve()[key] = value
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+def _resolved(value):
+    return value
+
+def _forward(function):
+    def method(self, *args):
+        return function(self.resolve(), *(arg.resolve() if type(arg) is Deferred else arg for arg in args))
+    return method
+
+def _forward_reflected(function):
+    def method(self, other):
+        return function(other, self.resolve())
+    return method
+
+for _function in (repr, str, bytes, bool, len, iter, reversed, int, float, complex, abs, round):
+    setattr(Deferred, f'__{_function.__name__}__', _forward(_function))
+for _name in ('index', 'neg', 'pos', 'invert', 'eq', 'ne', 'lt', 'le', 'gt', 'ge', 'contains', 'getitem', 'delitem'):
+    setattr(Deferred, f'__{_name}__', _forward(getattr(operator, _name)))
+for _name in ('add', 'sub', 'mul', 'matmul', 'truediv', 'floordiv', 'mod', 'pow', 'lshift', 'rshift', 'and', 'or', 'xor'):
+    _function = getattr(operator, _name + '_' if _name in ('and', 'or') else _name)
+    setattr(Deferred, f'__{_name}__', _forward(_function))
+    setattr(Deferred, f'__r{_name}__', _forward_reflected(_function))
+del _function, _name
+
+def _force(value):
+    """ Resolves the ``Deferred`` values in the arguments of a constructor, and in
+    the lists, tuples, sets and dicts in them, so the constructor gets real values.
+    """
+    if type(value) is Deferred:
+        return value.resolve()
+    if isinstance(value, list):
+        for i, elem in enumerate(value):
+            value[i] = _force(elem)
+    elif isinstance(value, dict):
+        for key, elem in value.items():
+            value[key] = _force(elem)
+    elif type(value) is tuple:
+        return tuple(_force(elem) for elem in value)
+    elif isinstance(value, (set, frozenset)):
+        elems = [_force(elem) for elem in value]
+        if isinstance(value, frozenset):
+            return type(value)(elems)
+        value.clear()
+        value.update(elems)
+    return value
+
+def _copy_deferred(value: Deferred, copy):
+    """ Copies a ``Deferred`` for a reference to it, without constructing it if it
+    has not been used yet.
+    """
+    with value._lock:
+        if value._factory is None:
+            return copy(value._value)
+        return Deferred(value._factory, copy(value._args), copy(value._kwargs), value._memo, value._at)
+
+class _ScopeManager:
+    def __init__(self, parser):
+        self.parser = parser
+    def __enter__(self): pass
+    def __exit__(self, exc_typ, exc_val, exc_tb):
+        del self.parser.references.maps[0]
+        if not (exc_typ or exc_val or exc_tb) and hasattr(self.parser, 'value'):
+            self.parser.references.maps[-1][self.parser.current_name] = self.parser.value
+            if len(self.parser.names) > 1:
+                self.parser.references[self.parser.names[-1]] = self.parser.value
+            del self.parser.value
+        del self.parser.names[-1]
+
 class DataParser:
     key_types = (NAME, STRING, NUMBER)
     num_list_start = re.compile(r"(?:0+(?:_+0+)*_*1|1)\.")
@@ -717,67 +1215,36 @@ class DataParser:
             return token.type == NUMBER and token.string.endswith('.') and int(token.string[:-1]) == num
         return test
 
-    def __init__(self, tokens: Iterable[TokenInfo], filename='<unknown source>', allow_Infinity_and_NaN=True, python_constants=True, allow_imports=True):
+    def __init__(self, tokens: Iterable[TokenInfo], filename='<unknown source>', allow_Infinity_and_NaN=True, python_constants=True, allow_imports=True, loader=None):
         if not isinstance(filename, str):
             raise TypeError(f"'filename' must be a string, not {type(filename).__name__!r}")
+        if loader is None:
+            loader = _get_loader(allow_Infinity_and_NaN, python_constants, allow_imports)
+        self.loader = loader
+        self.filename = filename
+        self.__dict__.update(loader.parser_state)
+        self._scope = _ScopeManager(self)
+        self.reset(tokens)
+
+    def reset(self, tokens: Iterable[TokenInfo], filename=None):
+        """ Makes the parser start over on another document, read from ``tokens``
+        (and ``filename``, if given), with the same options. Only the state of the
+        document itself (its tokens, references and imports) is set up again.
+        """
+        if filename is not None:
+            if not isinstance(filename, str):
+                raise TypeError(f"'filename' must be a string, not {type(filename).__name__!r}")
+            self.filename = filename
         self.tokens = LookAheadListIterator(tokens)
         if len(self.tokens) == 0:
             raise ValueError("invalid token list: no tokens given")
         if self.tokens[-1].type != ENDMARKER:
             raise ValueError("invalid token list: did not end with an ENDMARKER token")
         self.tokens.default = self.tokens[-1]
-        self.filename = filename
-        self.allow_inf_nan = allow_Infinity_and_NaN
-        self.allow_imports = allow_imports
-        self.import_globals = {
-            'set': set,
-            'tuple': tuple,
-            'dict': dict,
-            'str': str,
-            'int': int,
-            'float': float,
-            'complex': complex,
-            'frozenset': frozenset,
-            'bytearray': bytearray,
-            'bytes': bytes,
-            'chr': chr,
-            'ord': ord,
-            'sorted': sorted,
-            'range': range,
-            'reversed': reversed,
-            'namedtuple': namedtuple,
-            'deque': deque,
-            'Counter': Counter,
-            'OrderedDict': OrderedDict
-        }
-        if allow_imports:
-            self.import_locals = {}
+        self.import_globals = self.builtin_types.copy()
+        self.types = self.loader.types.copy()
         self.references = ChainMap()
         self.names = []
-        if python_constants:
-            self.inf = 'inf'
-            self.nan = 'nan'
-            self.true = 'True'
-            self.false = 'False'
-            self.none = 'None'
-        else:
-            self.inf = 'Infinity'
-            self.nan = 'NaN'
-            self.true = 'true'
-            self.false = 'false'
-            self.none = 'null'
-        self.ninf = '-' + self.inf
-        self.nnan = '-' + self.nan
-        pinf = '+' + self.inf
-        pnan = '+' + self.nan
-        self.inf = (self.inf, pinf)
-        self.nan = (self.nan, pnan)
-        self.infj = (*(x+'j' for x in self.inf), *(x+'J' for x in self.inf))
-        self.pinfj = (pinf + 'j', pinf + 'J')
-        self.nanj = (*(x+'j' for x in self.nan), *(x+'J' for x in self.nan))
-        self.pnanj = (pnan + 'j', pnan + 'J')
-        self.ninfj = (self.ninf + 'j', self.ninf + 'J')
-        self.nnanj = (self.nnan + 'j', self.nnan + 'J')
         if self.token.type == ENCODING:
             next(self.tokens)
         # Skip leading comments
@@ -790,21 +1257,6 @@ class DataParser:
                 if sub == "" or sub.isspace():
                     next(self.tokens)
 
-        class ScopeManager:
-            def __init__(self, parser):
-                self.parser = parser
-            def __enter__(self): pass
-            def __exit__(self, exc_typ, exc_val, exc_tb):
-                del self.parser.references.maps[0]
-                if not (exc_typ or exc_val or exc_tb) and hasattr(self.parser, 'value'):
-                    self.parser.references.maps[-1][self.parser.current_name] = self.parser.value
-                    if len(self.parser.names) > 1:
-                        self.parser.references[self.parser.names[-1]] = self.parser.value
-                    del self.parser.value
-                del self.parser.names[-1]
-
-        self._scope = ScopeManager(self)
-
     @property
     def current_name(self) -> str:
         return '.'.join(self.names)
@@ -919,6 +1371,8 @@ class DataParser:
             raise DataParseError(f"no type {name!r} has been imported", self.filename, start)
 
     def copy(self, value):
+        if type(value) is Deferred:
+            return _copy_deferred(value, self.copy)
         if isinstance(value, dict):
             newvalue = type(value)()
             for key, value in value.items():
@@ -990,27 +1444,93 @@ class DataParser:
     # ------------------------------------------------------
 
     def parse_all(self):
+        sections = self.iter_parse_all()
+        while True:
+            try:
+                next(sections)
+            except StopIteration as e:
+                return e.value
+
+    def iter_parse_all(self):
+        """ Generator version of ``parse_all``. Yields ``(document, key)`` after every
+        top-level section and returns the parsed document, so that callers (such as
+        ``aload``) can interleave parsing with other work.
+        """
         if self.token.type == ENDMARKER:
             return {}
         if self.allow_imports:
+            self.split_import_words()
             while self.test(('from', 'import')):
                 self.parse_import()
+                self.split_import_words()
         key, value = self.parse_key_value()
-        return self._parse_object_rest({(key):value}, indented=None)
+        obj = {(key):value}
+        yield obj, key
+        return (yield from self._iter_object_rest(obj, indented=None))
+
+    def iter_items(self):
+        """ Yields the top-level ``(key, value)`` pairs of the document, each one as
+        soon as it has been parsed.
+
+        If the document uses no references (``@``, ``*`` or ``**``), the parser does
+        not keep the values it has yielded, so only one top-level value at a time
+        needs to fit in memory. A ``**`` merge can give a key which has been yielded
+        a new value, so a document which uses one is parsed in full first, and each
+        key is yielded once, with its final value.
+        """
+        operators = {token.string for token in self.tokens.list if token.type == OP}
+        if '**' in operators:
+            obj = {}
+            for obj, key in self.iter_parse_all():
+                pass
+            yield from obj.items()
+            return
+        release = not operators.intersection(('@', '*'))
+        for obj, key in self.iter_parse_all():
+            yield key, obj[key]
+            if release:
+                # The key stays, for the duplicate key check.
+                obj[key] = None
+                self.references.maps[-1].clear()
     
+    def split_import_words(self):
+        """ The tokenizer reads words separated by spaces as a single NAME, so an
+        import statement such as ``from collections import OrderedDict as od`` comes
+        as one token. If the current line starts such a statement (and is not a key),
+        its NAME tokens are split into one per word.
+        """
+        tokens = self.tokens.list
+        i = self.tokens.marker
+        token = tokens[i]
+        if token.type != NAME or token.string.split(' ', 1)[0] not in ('import', 'from') or tokens[i+1].string == ':':
+            return
+        depth = 0
+        while token.type != ENDMARKER and (token.type != NEWLINE or depth > 0):
+            if token.type == OP:
+                if token.string == '(':
+                    depth += 1
+                elif token.string == ')':
+                    depth -= 1
+            elif token.type == NAME and ' ' in token.string:
+                row, col = token.start
+                words = [TokenInfo(NAME, word.group(), (row, col + word.start()), (row, col + word.end()), token.line) for word in re.finditer(r'\S+', token.string)]
+                tokens[i:i+1] = words
+                i += len(words) - 1
+            i += 1
+            token = tokens[i]
+
     def parse_import(self):
         if self.eat('import'):
             packages = {}
             self.parse_import_name_list(packages)
             for package, alias in packages.items():
-                module = __import__(package, self.import_globals, self.import_locals)
-                # for attr in package.split('.')[1:]:
-                #     module = getattr(module, attr)
-                if '.' in package:
-                    name = package[0:package.index('.')]
+                if alias != package:
+                    # 'import a.b as c' binds the submodule itself.
+                    parent, _, name = package.rpartition('.')
+                    self.import_globals[alias] = _lazy_import(parent, name) if parent else _lazy_import(package)
                 else:
-                    name = package
-                self.import_globals[name] = module
+                    # 'import a.b' binds the top-level package.
+                    self.import_globals[package.split('.', 1)[0]] = _lazy_import(package)
 
         elif self.eat('from'):
             package = self.parse_import_name()
@@ -1021,9 +1541,8 @@ class DataParser:
                 self.expect(')')
             else:
                 self.parse_import_name_list(from_names)
-            imports = __import__(package, self.import_globals, self.import_locals, from_names.keys())
             for name, alias in from_names.items():
-                self.import_globals[alias] = getattr(imports, name)
+                self.import_globals[alias] = _lazy_import(package, name)
         else:
             raise self.expected(('import', 'from'))
 
@@ -1114,9 +1633,43 @@ class DataParser:
         start = self.token
         name = self.expect(NAME)
         try:
-            return eval(name, self.import_globals, {}), start
+            return self.types[name], start
         except KeyError:
-            raise DataParseError(f"no type {name!r} has been imported", self.filename, start)
+            value = self.types[name] = self.resolve_type(name, start)
+            return value, start
+
+    def resolve_type(self, name: str, start: TokenInfo):
+        """ Looks up a type name such as ``OrderedDict`` or ``collections.abc.Set``:
+        the first part among the built-in and imported types (or else the Python
+        builtins), the rest as attributes. Names made of built-in types only are
+        also cached by the loader, for the next documents.
+        """
+        parts = name.split('.')
+        for part in parts:
+            if not part.isidentifier() or iskeyword(part):
+                raise DataParseError(f"{name!r} is not a valid type name", self.filename, start)
+        try:
+            value = self.import_globals[parts[0]]
+        except KeyError:
+            try:
+                value = getattr(builtins, parts[0])
+            except AttributeError:
+                raise DataParseError(f"no type {name!r} has been imported", self.filename, start) from None
+        if isinstance(value, _LazyImport):
+            try:
+                value = value.resolve()
+            except (ImportError, AttributeError) as e:
+                raise DataParseError(f"cannot import {value}", self.filename, start) from e
+        for i in range(1, len(parts)):
+            try:
+                value = getattr(value, parts[i])
+            except AttributeError:
+                raise DataParseError(f"{'.'.join(parts[:i])!r} has no attribute {parts[i]!r}", self.filename, start) from None
+        if parts[0] in self.builtin_types:
+            # Imports can not take the name of a built-in type, so this holds
+            # for every document.
+            self.loader.types[name] = value
+        return value
 
     def parse_reference(self):
         start = self.token
@@ -1196,7 +1749,7 @@ class DataParser:
         if self.test('@'):
             referenced = self.parse_reference()
             start = self.token
-            if not self.test(',', '}', ')', ']', ENDMARKER, NEWLINE):
+            if not self.test((',', '}', ')', ']', ENDMARKER, NEWLINE)):
                 value = self.parse_value()
                 value = self.merge(value, referenced, start)
             else:
@@ -1225,7 +1778,7 @@ class DataParser:
             referenced = self.parse_reference()
             self.skip_blanks()
             start = self.token
-            if not self.test(',', '}', ')', ']', ENDMARKER):
+            if not self.test((',', '}', ')', ']', ENDMARKER)):
                 value = self.parse_inline_value()
                 value = self.merge(value, referenced, start)
             else:
@@ -1250,12 +1803,16 @@ class DataParser:
     def _parse_key_value_rest(self, allow_typed_section_block=True):
         if allow_typed_section_block and self.test(NAME, NEWLINE, INDENT, self.key_types, ':') or self.test(NAME, NEWLINE, INDENT, ('-', '--', '---', self.num_list_start)):
             imported_type, start = self.parse_imported_type()
-            value = self.parse_section_block()
-            value = self.finalize_explicit_type(imported_type, start, args=[value], kwargs={})
+            obj = None
+            if self.test(NEWLINE, INDENT, self.key_types, ':'):
+                obj = self.new_mapping(imported_type)
+            value = self.parse_section_block(obj=obj)
+            if obj is None:
+                value = self.finalize_explicit_type(imported_type, start, args=[value], kwargs={})
         elif self.test('@'):
             referenced = self.parse_reference()
             start = self.token
-            if not self.test(',', '}', ')', ']', ENDMARKER) and (not self.test(NEWLINE) or self.test(NEWLINE, (INDENT, '-', '--', '---', self.num_list_start))):
+            if not self.test((',', '}', ')', ']', ENDMARKER)) and (not self.test(NEWLINE) or self.test(NEWLINE, (INDENT, '-', '--', '---', self.num_list_start))):
                 value = self._parse_key_value_rest()
                 value = self.merge(value, referenced, start)
             else: 
@@ -1558,6 +2115,18 @@ class DataParser:
                 return self._parse_inline_object_rest({(key):value})
 
     def _parse_object_rest(self, obj: dict, indented: bool):
+        sections = self._iter_object_rest(obj, indented)
+        while True:
+            try:
+                next(sections)
+            except StopIteration as e:
+                return e.value
+
+    def _iter_object_rest(self, obj: dict, indented: bool):
+        """ Generator version of ``_parse_object_rest``. Yields ``(obj, key)`` after
+        every entry added to ``obj`` and returns ``obj`` once the closing token has
+        been eaten.
+        """
         if indented:
             end_tokens = (DEDENT, '}')
         elif indented is None:
@@ -1577,6 +2146,7 @@ class DataParser:
                         raise DataParseError(f"element after ** must be a mapping, not {type(x).__name__!r}", self.filename, start)
                     for key, value in x.items():
                         obj[key] = self.copy(value)
+                        yield obj, key
                 elif self.test('*'):
                     raise DataParseError("* is not allowed here", self.filename, start)
                 else:
@@ -1584,6 +2154,7 @@ class DataParser:
                     if key in obj:
                         raise DataParseError(f"duplicate key {key!r}", self.filename, start)
                     obj[key] = value
+                    yield obj, key
                 while self.eat(','):
                     if not self.eat_newline():
                         if indented and self.test(NEWLINE, *end_tokens):
@@ -1602,6 +2173,7 @@ class DataParser:
                             raise DataParseError(f"element after ** must be a mapping, not {type(x).__name__!r}", self.filename, start)
                         for key, value in x.items():
                             obj[key] = self.copy(value)
+                            yield obj, key
                     elif self.test('*'):
                         raise DataParseError("* is not allowed here", self.filename, start)
                     else:
@@ -1609,6 +2181,7 @@ class DataParser:
                         if key in obj:
                             raise DataParseError(f"duplicate key {key!r}", self.filename, start)
                         obj[key] = value
+                        yield obj, key
                 else:
                     if indented and self.test(NEWLINE, *end_tokens):
                         self.expect(NEWLINE)
@@ -1627,6 +2200,7 @@ class DataParser:
                         raise DataParseError(f"element after ** must be a mapping, not {type(x).__name__!r}", self.filename, start)
                     for key, value in x.items():
                         obj[key] = self.copy(value)
+                        yield obj, key
                 elif self.test('*'):
                     raise DataParseError("* is not allowed here", self.filename, start)
                 else:
@@ -1634,6 +2208,7 @@ class DataParser:
                     if key in obj:
                         raise DataParseError(f"duplicate key {key!r}", self.filename, start)
                     obj[key] = value
+                    yield obj, key
 
         self.expect(*end_tokens)
         return obj
@@ -2202,14 +2777,26 @@ class DataParser:
         self.expect(')')
         return self.finalize_explicit_type(value, value_start, args, kwargs)
 
+    def new_mapping(self, cls):
+        """ Returns an empty instance of ``cls`` for a typed section block to be
+        parsed straight into, instead of into a dict which ``cls`` is then built
+        from, or None if ``cls`` is not a mutable mapping type which can be made
+        without arguments.
+        """
+        if not isinstance(cls, type) or not issubclass(cls, MutableMapping):
+            return None
+        try:
+            return cls()
+        except Exception:
+            return None
+
     def finalize_explicit_type(self, value, value_start: TokenInfo, args: list, kwargs: dict):
+        if self.lazy:
+            return Deferred(value, args, kwargs, self.memo, (self.filename, *value_start.start, value_start.line))
         try:
-            result = value(*args, **kwargs)
+            return _construct(value, args, kwargs, self.memo)
         except Exception as e:
             raise DataParseError(f"exception raised from explicit type constructor", self.filename, value_start) from e
-        if isgenerator(result):
-            result = list(result)
-        return result
 
     def parse_simple_value(self):
         if self.token.type == NUMBER:
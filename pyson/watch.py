@@ -0,0 +1,138 @@
+import os
+import time
+import threading
+
+from .parser import _read_bytes, _load_bytes
+from .diff import subtree_hashes, diff, patch
+
+class Watcher:
+    """ Keeps ``data`` in sync with the PySON file at ``path``.
+
+    Every ``interval`` seconds the file's modification time and size are
+    looked at. Once they have changed and then stayed the same for
+    ``debounce`` seconds (so a file which is still being written is not
+    read), the file is parsed again, compared with ``data`` by ``diff``
+    and the changes are applied to ``data`` in place: dicts and lists which
+    did not change keep their identity. ``callback(data, changes)`` is then
+    called from the watcher's thread.
+
+    If the new file can not be read or parsed, ``on_error(exception)`` is
+    called (if given) and ``data`` is left as it is.
+
+    Changes are applied while holding ``lock``; hold it to read ``data``
+    from other threads without seeing an update half applied.
+    """
+
+    def __init__(self, path, callback, interval=1.0, debounce=0.25, 
+                 allow_Infinity_and_NaN=True, on_error=None):
+        self.path = path
+        self.callback = callback
+        self.interval = interval
+        self.debounce = debounce
+        self.allow_inf_nan = allow_Infinity_and_NaN
+        self.on_error = on_error
+        self.lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._pending = self._pending_since = None
+        self._content = _read_bytes(path)
+        self._stat = self._read_stat()
+        self.data = _load_bytes(self._content, path, allow_Infinity_and_NaN)
+        self._hashes = subtree_hashes(self.data)
+
+    def _read_stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def poll(self):
+        """ Checks the file once, and reloads it if it has changed and then
+        settled. Returns the list of changes applied (possibly empty), or
+        ``None`` if the file was not reloaded.
+        """
+        stat = self._read_stat()
+        now = time.monotonic()
+        if stat is None or stat == self._stat:
+            self._pending = None
+            return None
+        if stat != self._pending:
+            self._pending = stat
+            self._pending_since = now
+            if self.debounce > 0:
+                return None
+        elif now - self._pending_since < self.debounce:
+            return None
+        self._pending = None
+        return self.reload(stat)
+
+    def reload(self, stat=None):
+        """ Reads and applies the file now. """
+        try:
+            content = _read_bytes(self.path)
+            if stat is None:
+                stat = self._read_stat()
+            if content == self._content:
+                # Touched, but not changed.
+                self._stat = stat
+                return []
+            new = _load_bytes(content, self.path, self.allow_inf_nan)
+        except Exception as e:
+            # Wait for the next change before trying again.
+            self._stat = stat
+            if self.on_error is None:
+                return None
+            self.on_error(e)
+            return None
+        new_hashes = subtree_hashes(new)
+        with self.lock:
+            changes = diff(self.data, new, self._hashes, new_hashes)
+            self.data = patch(self.data, changes)
+            self._hashes = new_hashes
+        self._content = content
+        self._stat = stat
+        if changes:
+            self.callback(self.data, changes)
+        return changes
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f'pyson.watch({self.path!r})', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.poll()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+def watch(path, callback, interval=1.0, debounce=0.25, 
+          allow_Infinity_and_NaN=True, on_error=None):
+    """ Loads the PySON file at ``path`` and keeps the result up to date in
+    a background thread; see ``Watcher``. Returns the running ``Watcher``,
+    whose ``data`` attribute holds the document.
+
+    For example::
+
+        def reconfigure(config, changes):
+            for change in changes:
+                print(change.kind, change.path)
+
+        watcher = pyson.watch('settings.pyson', reconfigure)
+        config = watcher.data # updated in place from now on
+        ...
+        watcher.stop()
+    """
+    return Watcher(path, callback, interval, debounce, allow_Infinity_and_NaN, on_error).start()
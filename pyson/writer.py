@@ -1,371 +1,883 @@
-import io, re
+import re
 import math
-from collections.abc import MutableSet
+import asyncio
+import functools
+import hashlib
+from collections.abc import Iterable, Mapping
+from .parser import Deferred
 
-class IdentitySet(MutableSet):
-    key = id  # should return a hashable object
-
-    def __init__(self, iterable=()):
-        self.map = {} # id -> object
-        self |= iterable  # add elements from iterable to the set (union)
-
-    def __len__(self):  # Sized
-        return len(self.map)
-
-    def __iter__(self):  # Iterable
-        return iter(self.map.values())
-
-    def __contains__(self, x):  # Container
-        return self.key(x) in self.map
-
-    def add(self, value):  # MutableSet
-        """Add an element."""
-        self.map[self.key(value)] = value
+class IndentCache(dict):
+    """ Maps an indentation depth to the string which starts a new line at
+    that depth, building each string only once.
+    """
 
-    def discard(self, value):  # MutableSet
-        """Remove an element.  Do not raise an exception if absent."""
-        self.map.pop(self.key(value), None)
+    def __init__(self, indent):
+        self.indent = indent
 
-    def __repr__(self):
-        if self:
-            return '{0}([{1}])'.format(self.__class__.__name__, ', '.join(repr(item) for item in self))
+    def __missing__(self, depth):
+        if self.indent == 0:
+            line = ' '
         else:
-            return self.__class__.__name__ + '()'
+            line = '\n' + ' '*(self.indent*depth)
+        self[depth] = line
+        return line
 
-class EmptySet(MutableSet):
-    def __init__(self, iterable=()):
-        pass
-
-    def __len__(self):
-        return 0
+class ReferenceTable:
+    """ What ``dedup`` keeps track of during one dump: the fingerprint of
+    every container, where the first copy of each fingerprint was written,
+    and the path and scopes the parser will be in at the current position.
+    """
+    __slots__ = ('threshold', 'prints', 'targets', 'path', 'scopes', 'unclean', 'dotted')
 
-    def __iter__(self):
-        return self
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.prints = {} # id -> (object, fingerprint or None, size)
+        self.targets = {} # fingerprint -> dotted path of the first copy
+        self.path = [] # names of the enclosing values, None if unknown
+        self.scopes = [] # the enclosing dicts, without the top-level one
+        self.unclean = 0 # number of Nones in path
+        self.dotted = set() # paths of keys which contain a '.'
 
-    def __next__(self):
-        raise StopIteration
+    def note(self, key):
+        """ Records a key of the current dict whose path contains a dot, as
+        the parser would register it under a name that looks like a path.
+        """
+        if isinstance(key, str) and '.' in key and not self.unclean:
+            self.dotted.add('.'.join(self.path + [key]))
 
-    def __contains__(self, value):
-        return False
+    def enter_key(self, key, value):
+        # Only keys which the parser turns back into the same name, and
+        # which do not contain a dot, can be part of a reference.
+        if isinstance(key, str) and key and '.' not in key and not key[0].isdigit() and key[0] not in '+-':
+            self.path.append(key)
+        else:
+            self.path.append(None)
+            self.unclean += 1
+        self.scopes.append(value if isinstance(value, dict) else ())
 
-    def add(self, value):
-        pass
+    def enter_index(self, index, value):
+        self.path.append(str(index))
+        self.scopes.append(value if isinstance(value, dict) else ())
 
-    def discard(self, value):
-        pass
+    def leave(self, value):
+        """ Called once ``value`` has been written in full; from now on a
+        copy of it can be written as a reference to it.
+        """
+        if not self.unclean:
+            entry = self.prints.get(id(value))
+            if entry is not None and entry[1] is not None and entry[2] >= self.threshold:
+                self.targets.setdefault(entry[1], '.'.join(self.path))
+        if self.path.pop() is None:
+            self.unclean -= 1
+        self.scopes.pop()
 
-    def __repr__(self):
-        return self.__class__.__name__ + '()'
+    def reference(self, value):
+        """ Returns ``@'path'`` if ``value`` is a copy of a value written
+        earlier, and the reference would resolve to that value here.
+        """
+        entry = self.prints.get(id(value))
+        if entry is None or entry[1] is None or entry[2] < self.threshold:
+            return None
+        path = self.targets.get(entry[1])
+        if path is None:
+            return None
+        # A key of an enclosing dict with the same name hides the path.
+        for scope in self.scopes:
+            if path in scope:
+                return None
+        # So does a key like 'a.b', which is registered under the same path.
+        if self.dotted:
+            i = path.find('.')
+            while i != -1:
+                if path[:i] in self.dotted:
+                    return None
+                i = path.find('.', i+1)
+            if path in self.dotted:
+                return None
+        return '@' + repr(path)
 
 class PySONEncoder:
-    ALLOWED_TYPES = (dict, list, set, str, int, float, complex, bytes, bytearray, bool, type(None))
     KEY_REGEX = re.compile(r"^[-.\w]+$")
 
-    def __init__(self, fp, skipkeys=False, check_circular=True, 
+    BUFFER_SIZE = 4096
+    """int: The number of fragments the encoder collects before they are
+    joined and handed to ``fp.write`` as a single block.
+    """
+
+    def __init__(self, fp=None, skipkeys=False, check_circular=True, 
                  indent=None, default=None, sort_keys=False, 
-                 python_constants=False):
+                 python_constants=False, width=None, dedup=None, iterables=None,
+                 sections=True):
         self.fp = fp
-        self.write = fp.write
         self.skipkeys = skipkeys
         self.check_circular = check_circular
-        self._indent = indent
+        self.indent = indent
         self.default = default
         self.sort_keys = sort_keys
-        self.already_printed = IdentitySet() if check_circular else EmptySet()
         self.python_constants = python_constants
-        if python_constants:
-            self.TRUE = 'True'
-            self.FALSE = 'False'
-            self.INFINITY = 'inf'
-            self.NAN = 'nan'
-            self.NONE = 'None'
-        else:
-            self.TRUE = 'true'
-            self.FALSE = 'false'
-            self.INFINITY = 'Infinity'
-            self.NAN = 'NaN'
-            self.NONE = 'null'
-        self.curr_indent = 0
-        if indent is None:
-            self.separator = ','
-            self.keyseparator = ':'
-            self.space = ''
-        else:
-            self.separator = ', '
-            self.keyseparator = ': '
-            self.space = ' '
-
-    def indent(self):
-        if self._indent is not None:
-            self.curr_indent += 1
-            if self._indent == 0:
-                self.write(' ')
-            else:
-                self.write('\n')
-                self.write(' '*self._indent*self.curr_indent)
-
-    def newline(self):
-        if self._indent is not None:
-            if self._indent == 0:
-                self.write(' ')
-            else:
-                self.write('\n')
-                self.write(' '*self._indent*self.curr_indent)
-
-    def dedent(self):
-        if self._indent is not None:
-            self.curr_indent -= 1
-            if self._indent == 0:
-                self.write(' ')
-            else:
-                self.write('\n')
-                self.write(' '*self._indent*self.curr_indent)
+        self.width = width
+        self.dedup = dedup
+        self.iterables = iterables
+        self.sections = sections
+        self._iterencode = make_encoder(skipkeys, check_circular, indent, default, 
+                                        sort_keys, python_constants, width, dedup, 
+                                        iterables, sections, buffer_size=self.BUFFER_SIZE)
 
     def encode(self, obj):
-        try:
-            self._encode(obj)
-        except TypeError:
-            if self.default is None:
-                raise 
-            self._encode(self.default(obj))
-
-    def _encode(self, obj):
-        if obj is None:
-            self.encode_None()
-        elif isinstance(obj, dict):
-            self.encode_dict(obj)
-        elif isinstance(obj, (bytes, bytearray)):
-            self.encode_bytes(obj)
-        elif isinstance(obj, (list, set, tuple)):
-            self.encode_list(obj)
-        elif isinstance(obj, str):
-            self.encode_str(obj)
-        elif isinstance(obj, int):
-            self.encode_int(obj)
-        elif isinstance(obj, float):
-            self.encode_float(obj)
-        elif isinstance(obj, complex):
-            self.encode_complex(obj)
-        elif isinstance(obj, bool):
-            self.encode_bool(obj)
-        else:
-            raise TypeError(f"{type(obj).__name__!r} object is not PySON-serializable")
+        write = self.fp.write
+        for chunk in self._iterencode(obj):
+            write(chunk)
+
+    def iterencode(self, obj):
+        """ Encode ``obj`` and yield its PySON representation as string
+        chunks, like ``json.JSONEncoder.iterencode``.
+
+        A chunk is yielded every ``BUFFER_SIZE`` fragments, so only one chunk
+        is held in memory at a time and the output can be streamed into
+        sockets, compressors or WSGI responses. ``fp`` is not used.
+
+        For example::
+
+            for chunk in PySONEncoder(indent=4).iterencode(bigobject):
+                mysocket.write(chunk.encode('utf-8'))
+        """
+        return self._iterencode(obj)
+
+def make_encoder(skipkeys=False, check_circular=True, 
+                 indent=None, default=None, sort_keys=False,
+                 python_constants=False, width=None, dedup=None,
+                 iterables=None, sections=True, canonical=False, 
+                 single_line=False, buffer_size=PySONEncoder.BUFFER_SIZE):
+    """ Build a PySON encoder specialized for the given options, in the
+    spirit of ``json.encoder._make_iterencode``.
 
-    def encode_None(self):
-        self.write(self.NONE)
+    The options have the same meaning as in ``dump``. The result is a
+    function ``iterencode(obj)`` which returns an iterator over the string
+    chunks of the PySON representation of ``obj``; a chunk is produced
+    every ``buffer_size`` fragments. All per-dump state lives in that
+    iterator, so one encoder can be reused for any number of dumps, from
+    any number of threads.
 
-    def encode_key(self, key):
+    If ``canonical`` is true, the output only depends on the value, and
+    values of different types get different text (except ``bytes`` and
+    ``bytearray``): strings and bytes (keys included) are always quoted,
+    tuples are written between parentheses and sets between braces (an
+    empty one as ``set()``), keys are sorted by their text and then by the
+    name of their type, sets are sorted by the text of their elements and
+    ``-0.0`` is written as ``0.0``. Use it with ``indent=None``.
+
+    If ``single_line`` is true, strings and bytes are never written as
+    triple-quoted blocks and booleans use the literals of
+    ``python_constants``, so that with ``indent=None`` every value is
+    written on one line which reads back with the same ``python_constants``.
+
+    Values are dispatched through ``type(obj) -> handler`` tables. Types
+    which are not in the tables (such as subclasses of ``dict`` or ``int``)
+    are resolved once with the same ``isinstance`` checks, in the same
+    order, as the original encoder, and the result is cached.
+    """
+    if iterables not in (None, 'block', 'inline'):
+        raise ValueError(f"iterables must be None, 'block' or 'inline', not {iterables!r}")
+    if python_constants:
+        TRUE, FALSE, INFINITY, NAN, NONE = 'True', 'False', 'inf', 'nan', 'None'
+    else:
+        TRUE, FALSE, INFINITY, NAN, NONE = 'true', 'false', 'Infinity', 'NaN', 'null'
+    N_INFINITY = '-' + INFINITY
+    constants = frozenset((TRUE, FALSE, NONE, INFINITY, NAN, '-'+INFINITY, '+'+INFINITY, '-'+NAN, '+'+NAN))
+    nonfinite = frozenset((INFINITY, N_INFINITY, NAN))
+
+    # Block layout (sections and one-element-per-line lists) is only used
+    # with a positive indent; indent=0 puts everything on one line.
+    block = bool(indent)
+    pretty = indent is not None
+    # With a width, lists and dicts inside lists are put on one line
+    # whenever they fit, instead of using the element-type heuristic.
+    layout = block and width is not None
+    line_breaks = IndentCache(indent)
+    if indent is None:
+        separator = ','
+        keyseparator = ':'
+        space = ''
+    else:
+        separator = ', '
+        keyseparator = ': '
+        space = ' '
+    item_separator = '' if block else ','
+
+    key_match = PySONEncoder.KEY_REGEX.match
+    isnan = math.isnan
+    inf = math.inf
+
+    def encode_key(key):
+        if isinstance(key, str):
+            if not canonical and key_match(key) and key not in constants:
+                return key
+            return repr(key)
+        if isinstance(key, bytes):
+            return repr(key)
         if isinstance(key, bytearray):
-            self.write(repr(bytes(key)))
-        elif isinstance(key, bytes):
-            self.write(repr(key))
-        elif PySONEncoder.KEY_REGEX.match(key) and key not in (self.TRUE, self.FALSE, self.NONE, self.INFINITY, self.NAN, '-'+self.INFINITY, '+'+self.INFINITY, '-'+self.NAN, '+'+self.NAN):
-            self.write(key)
+            return repr(bytes(key))
+        if canonical and isinstance(key, (int, float, complex)):
+            # Numbers are bare and strings quoted, so the two never meet.
+            if isinstance(key, float):
+                return encode_canonical_float(key)
+            if isinstance(key, complex):
+                return encode_canonical_complex(key)
+            return repr(key)
+        if isinstance(key, (int, float)):
+            return encode_key(repr(key))
+        if isinstance(key, complex):
+            key = repr(key)
+            if key[0] == '(':
+                key = key[1:-1]
+            return encode_key(key)
+        if skipkeys:
+            return None
+        raise TypeError(f'Invalid key type: {type(key).__name__!r}')
+
+    def encode_str(string):
+        if key_match(string):
+            # Only strings which start like a number can be read back as
+            # one; skip the (slow) complex() check for everything else.
+            first = string[1:2] if string[0] == '-' else string[0]
+            if first.isdigit() or first in '.iInNjJ':
+                try:
+                    complex(string)
+                except ValueError:
+                    pass
+                else:
+                    return repr(string)
+            if string in constants:
+                return repr(string)
+            return string
+        elif string.count('\n') > 2:
+            if "'" in string and not '"' in string:
+                quotes = '"""'
+            else:
+                quotes = "'''"
+            return quotes + '\n'.join(repr(line)[1:-1] for line in string.splitlines()) + quotes
         else:
-            self.write(repr(key))
+            return repr(string)
 
-    def encode_dict(self, obj: dict, check_circular=True):
-        if check_circular and obj in self.already_printed:
-            self.write("{}" if len(obj) == 0 else "...")
-            return
-        if self._indent is None or self._indent == 0:
-            self.encode_dict_braces(obj, check_circular=False)
-            return
-        self.already_printed.add(obj)
-        keys = obj.keys()
-        if self.sort_keys:
-            keys = sorted(keys)
+    def encode_bytes(bts):
+        if bts.count(b'\n') > 2:
+            if b"'" in bts and not b'"' in bts:
+                quotes = '"""'
+            else:
+                quotes = "'''"
+            return 'b' + quotes + '\n'.join(repr(line)[2:-1] for line in bts.splitlines()) + quotes
         else:
-            keys = list(keys)
-
-        for i, key in enumerate(keys):
-            
-            elem = obj[key]
-            if not isinstance(key, (str, bytes, bytearray)):
-                if isinstance(key, (int, float)):
-                    key = repr(key)
-                elif isinstance(key, complex):
-                    key = repr(key)
-                    if key[0] == '(':
-                        key = key[1:-1]
-                else:
-                    raise TypeError(f'Invalid key type: {type(key).__name__!r}')
-            if not isinstance(elem, PySONEncoder.ALLOWED_TYPES):
-                if self.default is None:
-                    raise TypeError(f"{type(elem).__name__!r} object is not PySON-serializable")
-                elem = self.default(elem)
-            if not isinstance(elem, (dict, set, list, tuple)) or elem not in self.already_printed:
-                if i != 0:
-                    self.newline()
-                self.encode_key(key)
-                self.write(self.keyseparator)
-                if isinstance(elem, dict):
-                    if len(elem) == 0:
-                        self.write('{}')
-                    else:
-                        self.indent()
-                        self.encode_dict(elem)
-                        self.curr_indent -= 1
-                else:
-                    self._encode(elem)
+            return repr(bts)
 
-    def encode_dict_braces(self, obj: dict, check_circular=True):
-        if check_circular and obj in self.already_printed:
-            self.write("{}" if len(obj) == 0 else "...")
-            return
-        self.already_printed.add(obj)
-        keys = obj.keys()
-        if self.sort_keys:
-            keys = sorted(keys)
+    def encode_float(num):
+        if num == inf:
+            return INFINITY
+        elif num == -inf:
+            return N_INFINITY
+        elif isnan(num):
+            return NAN
         else:
-            keys = list(keys)
+            return repr(num)
+
+    def encode_complex(num):
+        res = repr(num)
+        if res[0] == '(':
+            res = res[1:-1]
+        if not python_constants:
+            res = res.replace('inf', INFINITY).replace('nan', NAN)
+        return res
+
+    def encode_canonical_float(num):
+        # -0.0 == 0.0; adding 0.0 turns the one into the other.
+        return encode_float(num + 0.0)
 
-        if len(keys) == 0:
-            self.write('{}')
+    def encode_canonical_complex(num):
+        return encode_complex(complex(num.real + 0.0, num.imag + 0.0))
+
+    def encode_canonical_bytes(bts):
+        # Equal bytes and bytearrays get the same text.
+        return repr(bytes(bts))
+
+    def canonical_key(item):
+        # The type name orders keys with the same text the same way every
+        # time, whatever order they were inserted in.
+        return encode_key(item[0]) or '', type(item[0]).__name__
+
+    def canonical_text(value):
+        buffer = []
+        for _ in encode_value(value, buffer, None, None, None):
+            pass
+        return ''.join(buffer)
+
+    def encode_line_str(string):
+        # encode_str only breaks the line for strings with line breaks.
+        if '\n' in string:
+            return repr(string)
+        return encode_str(string)
+
+    def encode_line_bytes(bts):
+        return repr(bts)
+
+    def encode_bool(obj):
+        return TRUE if obj else FALSE
+
+    def encode_none(obj):
+        return NONE
+
+    def is_long(elem, scalar, text):
+        """ Whether a scalar list element forces a list onto several lines:
+        anything but a number whose ``repr`` is longer than 4 characters.
+        ``text`` is the element as it will be written.
+        """
+        if scalar is repr:
+            return len(text) > 4
+        if scalar is encode_float:
+            return len(text) > 4 and text not in nonfinite
+        if scalar is encode_complex:
+            return len(repr(elem)) > 4
+        return True
+
+    def items(obj):
+        if canonical:
+            # Keys of different types are ordered by their text.
+            return sorted(obj.items(), key=canonical_key)
+        if sort_keys:
+            return [(key, obj[key]) for key in sorted(obj)]
+        return obj.items()
+
+    def resolve(value):
+        """ Returns ``(value, scalar handler, container handler)`` for a value
+        whose type is not in the dispatch tables yet, calling ``default``
+        when the type is not serializable. A ``Deferred`` is replaced by its
+        value.
+        """
+        tp = type(value)
+        if tp is Deferred:
+            return resolve(value.resolve())
+        for types, handler, is_scalar in chain:
+            if issubclass(tp, types):
+                if is_scalar:
+                    scalars[tp] = handler
+                    return value, handler, None
+                containers[tp] = handler
+                return value, None, handler
+        if iterables is not None and isinstance(value, Iterable) and not isinstance(value, Mapping):
+            containers[tp] = encode_iterable
+            return value, None, encode_iterable
+        if default is None:
+            raise TypeError(f"{tp.__name__!r} object is not PySON-serializable")
+        value = default(value)
+        tp = type(value)
+        handler = scalars.get(tp)
+        if handler is not None:
+            return value, handler, None
+        handler = containers.get(tp)
+        if handler is not None:
+            return value, None, handler
+        for types, handler, is_scalar in chain:
+            if isinstance(value, types):
+                return (value, handler, None) if is_scalar else (value, None, handler)
+        raise TypeError(f"{tp.__name__!r} object is not PySON-serializable")
+
+    def inline(obj, container, ancestors, memo):
+        """ Returns the one-line form of a list or dict, or ``None`` if it is
+        wider than ``width``, spans several lines, contains one of the
+        containers it is nested in or is an iterator (which can only be
+        consumed once). Every container is measured at most once per dump;
+        the result is kept in ``memo``.
+        """
+        try:
+            return memo[id(obj)][1]
+        except KeyError:
+            pass
+        if container is encode_iterable:
+            return None
+        if ancestors is not None and id(obj) in ancestors:
+            return None
+        # Marks obj as unfit for one line while it is being measured, in
+        # case it contains itself.
+        memo[id(obj)] = (obj, None)
+        is_dict = container is encode_dict
+        parts = []
+        size = 2
+        for value in (items(obj) if is_dict else obj):
+            if is_dict:
+                key, value = value
+                key = encode_key(key)
+                if key is None:
+                    continue
+            scalar = scalars.get(type(value))
+            if scalar is None:
+                container = containers.get(type(value))
+                if container is None:
+                    value, scalar, container = resolve(value)
+            if scalar is not None:
+                text = scalar(value)
+                if '\n' in text:
+                    return None
+            else:
+                text = inline(value, container, ancestors, memo)
+                if text is None:
+                    return None
+            if is_dict:
+                text = key + keyseparator + text
+            size += len(text) + 2
+            if width is not None and size > width:
+                return None
+            parts.append(text)
+        if not parts:
+            text = '{}' if is_dict else '[]'
+        elif is_dict:
+            text = '{ ' + ', '.join(parts) + ' }'
         else:
-            self.write('{')
-            self.indent()
-            if self._indent is None or self._indent == 0:
-                separator = ','
+            text = '[ ' + ', '.join(parts) + ' ]'
+        memo[id(obj)] = (obj, text)
+        return text
+
+    def fingerprint(obj, container, prints, shapes):
+        """ Returns ``(obj, fingerprint, size)`` for a list or dict. Values
+        with the same fingerprint are written the same way; ``size`` is about
+        the length of the one-line form. Values which contain themselves, or
+        anything that needs ``default``, get ``None`` as fingerprint. Results
+        are kept in ``prints``, by id.
+        """
+        entry = prints.get(id(obj))
+        if entry is not None:
+            return entry
+        # Stays in place if obj turns out to contain itself.
+        prints[id(obj)] = entry = (obj, None, 0)
+        is_dict = container is encode_dict
+        parts = []
+        size = 2
+        for value in (items(obj) if is_dict else obj):
+            if is_dict:
+                key, value = value
+                key = encode_key(key)
+                if key is None:
+                    continue
+                size += len(key) + 2
+            scalar = scalars.get(type(value))
+            if scalar is None:
+                container = containers.get(type(value))
+                if container is None:
+                    if not isinstance(value, serializable):
+                        return entry
+                    value, scalar, container = resolve(value)
+            if scalar is not None:
+                part = scalar(value)
+                size += len(part) + 2
             else:
-                separator = ''
-            
-            for i, key in enumerate(keys):
-                elem = obj[key]
-                if not isinstance(key, (str, bytes, bytearray)):
-                    if isinstance(key, (int, float)):
-                        key = repr(key)
-                    elif isinstance(key, complex):
-                        key = repr(key)
-                        if key[0] == '(':
-                            key = key[1:-1]
+                _, part, length = fingerprint(value, container, prints, shapes)
+                if part is None:
+                    return entry
+                size += length + 2
+            parts.append((key, part) if is_dict else part)
+        shape = (is_dict, tuple(parts))
+        prints[id(obj)] = entry = (obj, shapes.setdefault(shape, len(shapes)), size)
+        return entry
+
+    def encode_section(obj, buffer, ancestors, memo, refs, depth):
+        """ Writes a dict as a block of ``key: value`` lines. """
+        if ancestors is not None:
+            if id(obj) in ancestors:
+                buffer.append('...' if obj else '{}')
+                return
+            ancestors[id(obj)] = obj
+        write = buffer.append
+        line_break = line_breaks[depth]
+        first = True
+        for name, value in items(obj):
+            key = encode_key(name)
+            if key is None:
+                continue
+            if refs is not None:
+                refs.note(name)
+            scalar = scalars.get(type(value))
+            if scalar is not None:
+                if not first:
+                    write(line_break)
+                first = False
+                write(key)
+                write(keyseparator)
+                write(scalar(value))
+            else:
+                container = containers.get(type(value))
+                if container is None:
+                    value, scalar, container = resolve(value)
+                    if scalar is not None:
+                        if not first:
+                            write(line_break)
+                        first = False
+                        write(key)
+                        write(keyseparator)
+                        write(scalar(value))
+                        continue
+                if ancestors is not None and id(value) in ancestors:
+                    continue
+                if not first:
+                    write(line_break)
+                first = False
+                write(key)
+                write(keyseparator)
+                if refs is not None:
+                    text = refs.reference(value)
+                    if text is not None:
+                        write(text)
+                        continue
+                    refs.enter_key(name, value)
+                if container is encode_dict and sections:
+                    if value:
+                        write(line_breaks[depth+1])
+                        yield from encode_section(value, buffer, ancestors, memo, refs, depth+1)
                     else:
-                        raise TypeError(f'Invalid key type: {type(key).__name__!r}')
-                if not isinstance(elem, PySONEncoder.ALLOWED_TYPES):
-                    if self.default is None:
-                        raise TypeError(f"{type(elem).__name__!r} object is not PySON-serializable")
-                    elem = self.default(elem)
-                if not isinstance(elem, (dict, set, list, tuple)) or elem not in self.already_printed:
-                    if i != 0:
-                        if separator:
-                            self.write(separator)
-                        self.newline()
-                    self.encode_key(key)
-                    self.write(self.keyseparator)
-                    if isinstance(elem, dict):
-                        self.encode_dict_braces(elem, check_circular=False)
+                        write('{}')
+                else:
+                    text = None
+                    if layout:
+                        text = inline(value, container, ancestors, memo)
+                        if text is not None and indent*depth + len(key) + len(keyseparator) + len(text) > width:
+                            text = None
+                    if text is not None:
+                        write(text)
                     else:
-                        self._encode(elem)
-                
-            self.dedent()
-            self.write('}')
-
-    def encode_list(self, lst: list):
-        if lst in self.already_printed:
-            self.write("[]" if len(lst) == 0 else "...")
+                        yield from container(value, buffer, ancestors, memo, refs, depth)
+                if refs is not None:
+                    refs.leave(value)
+            if len(buffer) >= buffer_size:
+                yield
+        if ancestors is not None:
+            del ancestors[id(obj)]
+
+    def encode_dict(obj, buffer, ancestors, memo, refs, depth):
+        """ Writes a dict between braces. """
+        if not obj:
+            buffer.append('{}')
             return
-        self.already_printed.add(lst)
-        elems = [None]*len(lst)
-        for i, elem in enumerate(lst):
-            if not isinstance(elem, PySONEncoder.ALLOWED_TYPES):
-                if self.default is None:
-                    raise TypeError(f"{type(elem).__name__!r} object is not PySON-serializable")
-                elem = self.default(elem)
-            elems[i] = elem
-        
-        if self._indent is None or self._indent == 0:
-            needs_newlines = False
-        else:
-            for elem in elems:
-                if isinstance(elem, (str, bytes, bytearray)) and len(elem) > 4 \
-                        or not isinstance(elem, (int, complex, float)) or len(repr(elem)) > 4:
+        if ancestors is not None:
+            if id(obj) in ancestors:
+                buffer.append('...')
+                return
+            ancestors[id(obj)] = obj
+        write = buffer.append
+        write('{')
+        if pretty:
+            line_break = line_breaks[depth+1]
+            write(line_break)
+        first = True
+        for name, value in items(obj):
+            key = encode_key(name)
+            if key is None:
+                continue
+            if refs is not None:
+                refs.note(name)
+            scalar = scalars.get(type(value))
+            container = None
+            if scalar is None:
+                container = containers.get(type(value))
+                if container is None:
+                    value, scalar, container = resolve(value)
+                if container is not None and ancestors is not None and id(value) in ancestors:
+                    continue
+            if not first:
+                if item_separator:
+                    write(item_separator)
+                if pretty:
+                    write(line_break)
+            first = False
+            write(key)
+            write(keyseparator)
+            if scalar is not None:
+                write(scalar(value))
+            else:
+                if refs is not None:
+                    text = refs.reference(value)
+                    if text is not None:
+                        write(text)
+                        continue
+                    refs.enter_key(name, value)
+                text = None
+                if layout:
+                    text = inline(value, container, ancestors, memo)
+                    if text is not None and indent*(depth+1) + len(key) + len(keyseparator) + len(text) > width:
+                        text = None
+                if text is not None:
+                    write(text)
+                else:
+                    yield from container(value, buffer, ancestors, memo, refs, depth+1)
+                if refs is not None:
+                    refs.leave(value)
+            if len(buffer) >= buffer_size:
+                yield
+        if pretty:
+            write(line_breaks[depth])
+        write('}')
+        if ancestors is not None:
+            del ancestors[id(obj)]
+
+    def encode_list(lst, buffer, ancestors, memo, refs, depth):
+        opening, closing = '[', ']'
+        if canonical and not isinstance(lst, list):
+            # Tuples and sets keep brackets of their own, so that they do not
+            # get the same text as a list.
+            if isinstance(lst, tuple):
+                opening, closing = '(', ',)' if len(lst) == 1 else ')'
+            elif lst:
+                opening, closing = '{', '}'
+            else:
+                buffer.append('set()')
+                return
+        if ancestors is not None:
+            if id(lst) in ancestors:
+                buffer.append('...' if len(lst) else '[]')
+                return
+            ancestors[id(lst)] = lst
+        write = buffer.append
+
+        # One pass over the elements resolves their handlers, writes the
+        # scalars to strings and decides whether newlines are needed.
+        elems = []
+        needs_newlines = False
+        unwritten = lst
+        if canonical and isinstance(lst, set):
+            # Sets are written in the order of their elements' text.
+            elems = [(text, None) for text in sorted(map(canonical_text, lst))]
+            unwritten = ()
+        for elem in unwritten:
+            scalar = scalars.get(type(elem))
+            container = None
+            if scalar is None:
+                container = containers.get(type(elem))
+                if container is None:
+                    elem, scalar, container = resolve(elem)
+            if scalar is not None:
+                text = scalar(elem)
+                if block and not needs_newlines and is_long(elem, scalar, text):
                     needs_newlines = True
-                    break
+                elems.append((text, None))
             else:
-                needs_newlines = False
+                needs_newlines = block
+                elems.append((elem, container))
+        if layout:
+            # The caller already tried to fit this list on one line.
+            needs_newlines = bool(elems)
 
-        self.write('[')
+        write(opening)
         if needs_newlines:
-            for i, elem in enumerate(elems):
-                if i == 0:
-                    self.indent()
+            line_break = line_breaks[depth+1]
+            for index, (elem, container) in enumerate(elems):
+                write(line_break)
+                if container is None:
+                    write(elem)
                 else:
-                    self.newline()
-                if isinstance(elem, dict):
-                    self.encode_dict_braces(elem)
+                    if refs is not None:
+                        text = refs.reference(elem)
+                        if text is not None:
+                            write(text)
+                            continue
+                        refs.enter_index(index, elem)
+                    text = None
+                    if layout:
+                        text = inline(elem, container, ancestors, memo)
+                        if text is not None and indent*(depth+1) + len(text) > width:
+                            text = None
+                    if text is not None:
+                        write(text)
+                    else:
+                        yield from container(elem, buffer, ancestors, memo, refs, depth+1)
+                    if refs is not None:
+                        refs.leave(elem)
+                if len(buffer) >= buffer_size:
+                    yield
+            write(line_breaks[depth])
+        elif elems:
+            write(space)
+            first = True
+            for index, (elem, container) in enumerate(elems):
+                if not first:
+                    write(separator)
+                first = False
+                if container is None:
+                    write(elem)
+                elif refs is not None:
+                    text = refs.reference(elem)
+                    if text is not None:
+                        write(text)
+                    else:
+                        refs.enter_index(index, elem)
+                        yield from container(elem, buffer, ancestors, memo, refs, depth)
+                        refs.leave(elem)
                 else:
-                    self._encode(elem)
-            self.dedent()
-        else:
-            if len(elems) != 0:
-                self.write(self.space)
-                for i, elem in enumerate(elems):
-                    if i != 0:
-                        self.write(self.separator)
-                    self._encode(elem)
-                self.write(self.space)
-        self.write(']')
-
-    def encode_str(self, string: str):
-        if PySONEncoder.KEY_REGEX.match(string):
-            try:
-                complex(string)
-                self.write(repr(string))
-            except ValueError:
-                self.encode_key(string)
-        elif string.count('\n') > 2:
-            if "'" in string and not '"' in string:
-                quotes = '"'
+                    yield from container(elem, buffer, ancestors, memo, refs, depth)
+                if len(buffer) >= buffer_size:
+                    yield
+            write(space)
+        write(closing)
+        if ancestors is not None:
+            del ancestors[id(lst)]
+
+    def encode_iterable(obj, buffer, ancestors, memo, refs, depth):
+        """ Writes the elements of an iterable as a list, one at a time. """
+        if ancestors is not None:
+            if id(obj) in ancestors:
+                buffer.append('...')
+                return
+            ancestors[id(obj)] = obj
+        write = buffer.append
+        stacked = block and iterables == 'block'
+        if stacked:
+            line_break = line_breaks[depth+1]
+        write('[')
+        index = -1
+        for index, elem in enumerate(obj):
+            if stacked:
+                write(line_break)
+            elif index:
+                write(separator)
+            else:
+                write(space)
+            scalar = scalars.get(type(elem))
+            container = None
+            if scalar is None:
+                container = containers.get(type(elem))
+                if container is None:
+                    elem, scalar, container = resolve(elem)
+            if scalar is not None:
+                write(scalar(elem))
+            elif refs is not None and refs.reference(elem) is not None:
+                write(refs.reference(elem))
             else:
-                quotes = "'"
-            quotes *= 3
+                if refs is not None:
+                    refs.enter_index(index, elem)
+                # Each element gets a memo of its own, which is dropped once
+                # it has been written, so the elements which have been
+                # streamed are not kept alive until the end of the dump.
+                element_memo = {} if memo is not None else None
+                if stacked:
+                    text = None
+                    if layout:
+                        text = inline(elem, container, ancestors, element_memo)
+                        if text is not None and indent*(depth+1) + len(text) > width:
+                            text = None
+                    if text is not None:
+                        write(text)
+                    else:
+                        yield from container(elem, buffer, ancestors, element_memo, refs, depth+1)
+                elif not block or container is encode_iterable:
+                    yield from container(elem, buffer, ancestors, element_memo, refs, depth)
+                else:
+                    # A list or dict in block layout would break the line.
+                    text = inline(elem, container, ancestors, element_memo)
+                    if text is None:
+                        raise ValueError(f"{type(elem).__name__!r} object does not fit on one line; use iterables='block'")
+                    write(text)
+                if refs is not None:
+                    refs.leave(elem)
+            if len(buffer) >= buffer_size:
+                yield
+        if index >= 0:
+            write(line_breaks[depth] if stacked else space)
+        write(']')
+        if ancestors is not None:
+            del ancestors[id(obj)]
 
-            self.write(quotes + '\n'.join(repr(line)[1:-1] for line in string.splitlines()) + quotes)
+    if canonical:
+        # Strings are always quoted and on one line: a bare word could also
+        # be a constant, and a triple-quoted block drops '\r' and the last
+        # line break.
+        str_handler, bytes_handler = str.__repr__, encode_canonical_bytes
+        float_handler, complex_handler = encode_canonical_float, encode_canonical_complex
+    elif single_line:
+        str_handler, bytes_handler = encode_line_str, encode_line_bytes
+        float_handler, complex_handler = encode_float, encode_complex
+    else:
+        str_handler, bytes_handler = encode_str, encode_bytes
+        float_handler, complex_handler = encode_float, encode_complex
+    # bool is an int subclass and has always been written by the int branch.
+    scalars = {
+        str: str_handler,
+        int: repr,
+        bool: encode_bool if single_line else repr,
+        float: float_handler,
+        complex: complex_handler,
+        bytes: bytes_handler,
+        bytearray: bytes_handler,
+        type(None): encode_none,
+    }
+    containers = {
+        dict: encode_dict,
+        list: encode_list,
+        set: encode_list,
+        tuple: encode_list,
+    }
+    # The order in which subclasses are matched, same as the original
+    # isinstance chain.
+    chain = (
+        (dict, encode_dict, False),
+        ((bytes, bytearray), bytes_handler, True),
+        ((list, set, tuple), encode_list, False),
+        (str, str_handler, True),
+        (int, repr, True),
+        (float, float_handler, True),
+        (complex, complex_handler, True),
+    )
 
-        else:
-            self.write(repr(string))
+    # Every type which is resolved without calling default.
+    serializable = tuple(types for types, handler, is_scalar in chain)
 
-    def encode_bytes(self, bts: bytes):
-        if bts.count(b'\n') > 2:
-            if b"'" in bts and not b'"' in bts:
-                quotes = '"'
+    def encode_value(obj, buffer, ancestors, memo, refs):
+        scalar = scalars.get(type(obj))
+        container = None
+        if scalar is None:
+            container = containers.get(type(obj))
+            if container is None:
+                obj, scalar, container = resolve(obj)
+        if refs is not None:
+            # References are names inside the top-level dict.
+            if container is encode_dict:
+                fingerprint(obj, container, refs.prints, {})
             else:
-                quotes = "'"
-            quotes *= 3
+                refs = None
+        if scalar is not None:
+            buffer.append(scalar(obj))
+        elif container is encode_dict and block:
+            yield from encode_section(obj, buffer, ancestors, memo, refs, 0)
+        else:
+            if layout and container is encode_list:
+                text = inline(obj, container, ancestors, memo)
+                if text is not None:
+                    buffer.append(text)
+                    return
+            yield from container(obj, buffer, ancestors, memo, refs, 0)
 
-            self.write('b' + quotes + '\n'.join(repr(line)[2:-1] for line in bts.splitlines()) + quotes)
+    def iterencode(obj):
+        buffer = []
+        # The containers currently being written, from the root down, so
+        # memory for the circular check grows with depth, not with size.
+        ancestors = {} if check_circular else None
+        memo = {} if layout or iterables == 'inline' else None
+        refs = ReferenceTable(dedup) if dedup is not None else None
+        for _ in encode_value(obj, buffer, ancestors, memo, refs):
+            yield ''.join(buffer)
+            buffer.clear()
+        if buffer:
+            yield ''.join(buffer)
 
-        else:
-            self.write(repr(bts))
-
-    def encode_int(self, num: int):
-        self.write(repr(num))
-
-    def encode_float(self, num: float):
-        if num == -math.inf:
-            self.write('-')
-            self.write(self.INFINITY)
-        elif num == math.inf:
-            self.write(self.INFINITY)
-        elif math.isnan(num):
-            self.write(self.NAN)
-        else:
-            self.write(repr(num))
+    return iterencode
 
-    def encode_complex(self, num: complex):
-        res: str = repr(num)
-        if res[0] == '(':
-            res: str = res[1:-1]
-        if not self.python_constants:
-            res = res.replace('inf', self.INFINITY).replace('nan', self.NAN)
-        self.write(res)
+@functools.lru_cache(maxsize=32)
+def _cached_encoder(*options):
+    return make_encoder(*options)
 
-    def encode_bool(self, b: bool):
-        self.write(self.TRUE if b else self.FALSE)
+def _get_encoder(*options):
+    try:
+        return _cached_encoder(*options)
+    except TypeError: # unhashable default
+        return make_encoder(*options)
 
 def dumps(obj, skipkeys=False, check_circular=True, 
           indent=None, default=None, sort_keys=False,
-          python_constants=False):
+          python_constants=False, width=None, dedup=None, iterables=None,
+          sections=True):
     """Serialize ``obj`` as a PySON formatted stream to a string.
 
     If ``skipkeys`` is true then ``dict`` keys that are not basic types
@@ -374,7 +886,9 @@ def dumps(obj, skipkeys=False, check_circular=True,
 
     If ``check_circular`` is false, then the circular reference check
     for container types will be skipped and a circular reference will
-    result in an ``OverflowError`` (or worse).
+    result in an ``OverflowError`` (or worse). Only a container found
+    inside itself is circular; a container shared by several parents is
+    written out in full every time.
 
     If ``indent`` is a non-negative integer, then JSON array elements and
     object members will be pretty-printed with that indent level. An indent
@@ -387,6 +901,32 @@ def dumps(obj, skipkeys=False, check_circular=True,
     If *sort_keys* is true (default: ``False``), then the output of
     dictionaries will be sorted by key.
 
+    If ``width`` is an integer and ``indent`` is positive, lists (and
+    dictionaries inside lists) are written on one line whenever they fit
+    within ``width`` columns, and with one element per line otherwise.
+    Every value is measured only once, so the layout takes linear time.
+    ``None`` keeps the default layout, which puts a list on several lines
+    as soon as it contains anything but short numbers.
+
+    If ``dedup`` is an integer and ``obj`` is a dict, a list or dict which
+    is equal to one written earlier, and whose one-line form is at least
+    ``dedup`` characters long, is written as a reference (``@'path.to.it'``)
+    to the first copy; ``load`` reads it back as a copy of that value.
+    Repeats are found by hashing every container bottom-up once, before
+    anything is written. ``None`` writes every value out in full.
+
+    If ``iterables`` is ``'block'`` or ``'inline'``, any other iterable
+    (generators, iterators, database cursors, ...) is written as a list
+    while it is being consumed, so it never has to fit in memory. Since
+    its elements are not known in advance, the layout is fixed by the
+    option: ``'block'`` puts one element per line (if ``indent`` is
+    positive), ``'inline'`` puts all of them on one line. ``None`` leaves
+    such objects to ``default``.
+
+    If ``sections`` is false (and ``indent`` is positive), dictionaries
+    inside the top-level one are written between braces, one entry per
+    line, instead of as indented blocks of ``key: value`` lines.
+
     If ``python_constants`` is true, then the following literals will be used:
         LITERAL     | Python Value
         ------------+-------------
@@ -404,23 +944,28 @@ def dumps(obj, skipkeys=False, check_circular=True,
         NaN         | math.nan
 
     """
-    fp = io.StringIO()
-    dump(obj, fp, skipkeys, check_circular, indent, default, sort_keys, python_constants)
-    return fp.getvalue()
+    return ''.join(_get_encoder(skipkeys, check_circular, indent, default, sort_keys, python_constants, width, dedup, iterables, sections)(obj))
 
 def dump(obj, fp, skipkeys=False, check_circular=True, 
          indent=None, default=None, sort_keys=False,
-         python_constants=False):
+         python_constants=False, width=None, dedup=None, iterables=None,
+         sections=True, binary=False):
     """Serialize ``obj`` as a PySON formatted stream to ``fp`` (a
     ``.write()``-supporting file-like object).
 
+    If ``binary`` is true, ``fp`` is a binary file, socket file or any other
+    object whose ``.write()`` takes bytes, or a ``bytearray`` to append to,
+    and the output is written as UTF-8, one chunk at a time.
+
     If ``skipkeys`` is true then ``dict`` keys that are not basic types
     (``str``, ``int``, ``float``, ``bool``, ``None``) will be skipped
     instead of raising a ``TypeError``.
 
     If ``check_circular`` is false, then the circular reference check
     for container types will be skipped and a circular reference will
-    result in an ``OverflowError`` (or worse).
+    result in an ``OverflowError`` (or worse). Only a container found
+    inside itself is circular; a container shared by several parents is
+    written out in full every time.
 
     If ``indent`` is a non-negative integer, then JSON array elements and
     object members will be pretty-printed with that indent level. An indent
@@ -433,6 +978,32 @@ def dump(obj, fp, skipkeys=False, check_circular=True,
     If *sort_keys* is true (default: ``False``), then the output of
     dictionaries will be sorted by key.
 
+    If ``width`` is an integer and ``indent`` is positive, lists (and
+    dictionaries inside lists) are written on one line whenever they fit
+    within ``width`` columns, and with one element per line otherwise.
+    Every value is measured only once, so the layout takes linear time.
+    ``None`` keeps the default layout, which puts a list on several lines
+    as soon as it contains anything but short numbers.
+
+    If ``dedup`` is an integer and ``obj`` is a dict, a list or dict which
+    is equal to one written earlier, and whose one-line form is at least
+    ``dedup`` characters long, is written as a reference (``@'path.to.it'``)
+    to the first copy; ``load`` reads it back as a copy of that value.
+    Repeats are found by hashing every container bottom-up once, before
+    anything is written. ``None`` writes every value out in full.
+
+    If ``iterables`` is ``'block'`` or ``'inline'``, any other iterable
+    (generators, iterators, database cursors, ...) is written as a list
+    while it is being consumed, so it never has to fit in memory. Since
+    its elements are not known in advance, the layout is fixed by the
+    option: ``'block'`` puts one element per line (if ``indent`` is
+    positive), ``'inline'`` puts all of them on one line. ``None`` leaves
+    such objects to ``default``.
+
+    If ``sections`` is false (and ``indent`` is positive), dictionaries
+    inside the top-level one are written between braces, one entry per
+    line, instead of as indented blocks of ``key: value`` lines.
+
     If ``python_constants`` is true, then the following literals will be used:
         LITERAL     | Python Value
         ------------+-------------
@@ -450,5 +1021,155 @@ def dump(obj, fp, skipkeys=False, check_circular=True,
         NaN         | math.nan
 
     """
-    PySONEncoder(fp, skipkeys, check_circular, indent, default, sort_keys, python_constants).encode(obj)
-    
+    chunks = _get_encoder(skipkeys, check_circular, indent, default, sort_keys, python_constants, width, dedup, iterables, sections)(obj)
+    if binary:
+        chunks = _encode_chunks(chunks)
+        write = fp.extend if isinstance(fp, bytearray) else fp.write
+    else:
+        write = fp.write
+    for chunk in chunks:
+        write(chunk)
+
+def dumpb(obj, skipkeys=False, check_circular=True, 
+          indent=None, default=None, sort_keys=False,
+          python_constants=False, width=None, dedup=None, iterables=None,
+          sections=True):
+    """Serialize ``obj`` as a PySON formatted stream to UTF-8 ``bytes``.
+
+    Each chunk of output is encoded as soon as it is produced, so the text
+    is never held in memory as one string next to its bytes.
+
+    The arguments have the same meaning as in ``dumps``.
+    """
+    return b''.join(_encode_chunks(_get_encoder(skipkeys, check_circular, indent, default, sort_keys, python_constants, width, dedup, iterables, sections)(obj)))
+
+def canonical_dumps(obj, default=None):
+    """Serialize ``obj`` to its canonical PySON string: two values which
+    compare equal get the same text, whatever the order their dicts and
+    sets were built in, and values of different types (a list and a tuple,
+    ``1`` and ``'1'``, ...) get different text, except equal ``bytes`` and
+    ``bytearray`` objects.
+
+    Strings and bytes are always quoted, tuples are written as ``(...)``
+    and sets as ``{...}`` (or ``set()``), keys are sorted by their text (and
+    the name of their type) and sets by the text of their elements,
+    ``-0.0`` is written as ``0.0``, the default literals (``true``,
+    ``Infinity``, ...) are used and there is no optional whitespace.
+    ``default`` has the same meaning as in ``dumps``.
+    """
+    return ''.join(_get_encoder(False, True, None, default, False, False, None, None, None, True, True)(obj))
+
+def digest(obj, algorithm='sha256', default=None):
+    """Return the hex digest of the UTF-8 encoded ``canonical_dumps(obj)``,
+    hashed chunk by chunk as it is produced instead of building the string.
+
+    ``algorithm`` is any name accepted by ``hashlib.new``.
+    """
+    hash = hashlib.new(algorithm)
+    for chunk in _encode_chunks(_get_encoder(False, True, None, default, False, False, None, None, None, True, True)(obj)):
+        hash.update(chunk)
+    return hash.hexdigest()
+
+def _encode_chunks(chunks):
+    for chunk in chunks:
+        # isascii() is a flag lookup; ASCII text is copied as it is.
+        if chunk.isascii():
+            yield chunk.encode('ascii')
+        else:
+            yield chunk.encode('utf-8')
+
+class AsyncWriterAdapter:
+    """ A ``.write()``-supporting file-like object which forwards the text
+    written to it by a ``PySONEncoder`` running in a worker thread to an
+    ``asyncio.StreamWriter`` on ``loop``.
+
+    Fragments are buffered until at least ``high_water`` characters have
+    accumulated, then they are encoded and written as one chunk and the
+    worker thread waits for ``writer.drain()`` to finish before it continues
+    encoding. A slow reader therefore throttles the encoder instead of making
+    the output pile up in memory.
+
+    Once ``cancel()`` has been called, ``write()`` and ``flush()`` raise
+    ``asyncio.CancelledError`` and nothing more reaches the writer.
+    """
+
+    def __init__(self, writer, loop, encoding='utf-8', high_water=2**16):
+        self.writer = writer
+        self.loop = loop
+        self.encoding = encoding
+        self.high_water = high_water
+        self.chunks = []
+        self.size = 0
+        self.cancelled = False
+        self.pending = None # the chunk being written, as a concurrent future
+
+    def write(self, string):
+        if self.cancelled:
+            raise asyncio.CancelledError()
+        self.chunks.append(string)
+        self.size += len(string)
+        if self.size >= self.high_water:
+            self.flush()
+
+    def flush(self):
+        if self.cancelled:
+            raise asyncio.CancelledError()
+        if self.chunks:
+            data = ''.join(self.chunks).encode(self.encoding)
+            self.chunks.clear()
+            self.size = 0
+            self.pending = asyncio.run_coroutine_threadsafe(self._write(data), self.loop)
+            if self.cancelled:
+                self.pending.cancel()
+            self.pending.result()
+
+    def cancel(self):
+        """ Stops the encoder thread at its next ``write()``, and stops waiting
+        for the reader if it is waiting in ``drain()``. Called on the loop.
+        """
+        self.cancelled = True
+        if self.pending is not None:
+            self.pending.cancel()
+
+    async def _write(self, data):
+        self.writer.write(data)
+        await self.writer.drain()
+
+async def adump(obj, writer, skipkeys=False, check_circular=True, 
+                indent=None, default=None, sort_keys=False,
+                python_constants=False, width=None, dedup=None, iterables=None,
+                sections=True, 
+                encoding='utf-8', 
+                high_water=2**16, executor=None):
+    """Serialize ``obj`` as a PySON formatted stream to ``writer`` (an
+    ``asyncio.StreamWriter``, or any object with ``write()`` and a
+    ``drain()`` coroutine).
+
+    The encoder runs in ``executor`` (a thread pool; ``None`` means the
+    loop's default executor) so the event loop stays free while large
+    containers are serialized. Output is written in chunks of at least
+    ``high_water`` characters, encoded with ``encoding``, and ``drain()`` is
+    awaited after every chunk.
+
+    ``obj`` must not be mutated until the returned coroutine has finished.
+    If it is cancelled, the encoder is stopped, and the cancellation is only
+    passed on once it has stopped, so nothing is written to ``writer`` after
+    that.
+
+    The other arguments have the same meaning as in ``dump``.
+    """
+    loop = asyncio.get_running_loop()
+    fp = AsyncWriterAdapter(writer, loop, encoding, high_water)
+    def encode():
+        dump(obj, fp, skipkeys, check_circular, indent, default, sort_keys, python_constants, width, dedup, iterables, sections)
+        fp.flush()
+    future = loop.run_in_executor(executor, encode)
+    try:
+        await asyncio.shield(future)
+    except asyncio.CancelledError:
+        fp.cancel()
+        await asyncio.wait((future,))
+        # The encoder stops with the CancelledError raised by fp.
+        if not future.cancelled():
+            future.exception()
+        raise
@@ -1,16 +1,294 @@
 import json, pyson
+import io
+import os
+import sys
 import os.path as path
 import argparse
+import fnmatch
+import hashlib
+from json.encoder import encode_basestring_ascii
+from converter import report_result, run_jobs
+
+def json_key(key):
+    """ Returns the JSON text of a dict key, converted the way ``json.dump``
+    converts keys, with bytes decoded and anything else passed to ``str``.
+    """
+    if isinstance(key, str):
+        return encode_basestring_ascii(key)
+    if isinstance(key, (bytes, bytearray)):
+        return encode_basestring_ascii(key.decode('utf-8'))
+    if key is True:
+        return '"true"'
+    if key is False:
+        return '"false"'
+    if key is None:
+        return '"null"'
+    if isinstance(key, (int, float)):
+        return '"' + json_number(key) + '"'
+    return encode_basestring_ascii(str(key))
+
+def json_number(num):
+    if isinstance(num, int):
+        return int.__repr__(num)
+    if num != num:
+        return 'NaN'
+    if num == float('inf'):
+        return 'Infinity'
+    if num == -float('inf'):
+        return '-Infinity'
+    return float.__repr__(num)
+
+def line_break(indent, depth):
+    """ What goes before an element at ``depth``; an ``indent`` of ``None``
+    puts everything on one line.
+    """
+    if indent is None:
+        return ''
+    return '\n' + ' '*(indent*depth)
+
+def write_json(value, write, indent=4, depth=0):
+    """ Writes ``value`` as JSON with ``write``, the way ``json.dump(value,
+    indent=indent)`` would (or ``separators=(',', ':')`` if ``indent`` is
+    ``None``), but converting tuples and sets to arrays, bytes to strings and
+    anything else to ``str`` as it goes.
+    """
+    if isinstance(value, str):
+        write(encode_basestring_ascii(value))
+    elif value is None:
+        write('null')
+    elif value is True:
+        write('true')
+    elif value is False:
+        write('false')
+    elif isinstance(value, (int, float)):
+        write(json_number(value))
+    elif isinstance(value, dict):
+        if not value:
+            write('{}')
+            return
+        inner = line_break(indent, depth+1)
+        key_separator = ':' if indent is None else ': '
+        first = True
+        write('{')
+        for key, elem in value.items():
+            write(inner if first else ',' + inner)
+            first = False
+            write(json_key(key))
+            write(key_separator)
+            write_json(elem, write, indent, depth+1)
+        write(line_break(indent, depth) + '}')
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        if not value:
+            write('[]')
+            return
+        inner = line_break(indent, depth+1)
+        first = True
+        write('[')
+        for elem in value:
+            write(inner if first else ',' + inner)
+            first = False
+            write_json(elem, write, indent, depth+1)
+        write(line_break(indent, depth) + ']')
+    elif isinstance(value, (bytes, bytearray)):
+        write(encode_basestring_ascii(value.decode('utf-8')))
+    else:
+        write(encode_basestring_ascii(str(value)))
+
+def transcode(infile, outfile, allow_inf_nan=False, indent=4):
+    """ Converts the PySON document read from ``infile`` (a binary file or a
+    file name) to JSON written to ``outfile`` (anything with a ``write``
+    method which takes strings). ``indent=None`` writes a single line.
+
+    Every top-level entry is written as soon as it has been parsed, and then
+    dropped, so unless the document uses references only one top-level
+    value is in memory at a time.
+    """
+    write = outfile.write
+    inner = line_break(indent, 1)
+    key_separator = ':' if indent is None else ': '
+    first = True
+    write('{')
+    for key, value in pyson.iter_load(infile, allow_inf_nan):
+        write(inner if first else ',' + inner)
+        first = False
+        write(json_key(key))
+        write(key_separator)
+        write_json(value, write, indent, 1)
+    write('}' if first else line_break(indent, 0) + '}')
+
+class ChunkWriter:
+    """ Collects the strings written to it and writes them to the binary
+    ``stream`` as UTF-8, ``size`` strings at a time.
+    """
+
+    def __init__(self, stream, size=4096):
+        self.stream = stream
+        self.size = size
+        self.parts = []
+
+    def write(self, string):
+        self.parts.append(string)
+        if len(self.parts) >= self.size:
+            self.flush()
+
+    def flush(self):
+        if self.parts:
+            self.stream.write(''.join(self.parts).encode('utf-8'))
+            self.parts.clear()
+        self.stream.flush()
+
+def output_name(filename):
+    return path.splitext(filename)[0] + '.json'
+
+def file_hash(filename):
+    hash = hashlib.sha256()
+    with open(filename, 'rb') as file:
+        for block in iter(lambda: file.read(2**16), b''):
+            hash.update(block)
+    return hash.hexdigest()
+
+def convert_file(filename, allow_inf_nan=False, indent=4):
+    """ Converts the PySON file ``filename`` to a JSON file next to it and
+    returns the name of the JSON file. The output is written while the input
+    is parsed; it only replaces the old JSON file once the whole input has
+    been converted.
+    """
+    newname = output_name(filename)
+    tempname = newname + '.tmp'
+    try:
+        with open(filename, 'rb') as file, open(tempname, 'w') as output:
+            transcode(file, output, allow_inf_nan, indent)
+    except BaseException:
+        if path.exists(tempname):
+            os.remove(tempname)
+        raise
+    os.replace(tempname, newname)
+    return newname
+
+def _convert_job(filename, allow_inf_nan, incremental, indent=4):
+    """ Runs ``convert_file`` (in a worker process). Returns ``(filename,
+    newname, manifest entry, error message, traceback)``.
+    """
+    try:
+        stat = os.stat(filename)
+        newname = convert_file(filename, allow_inf_nan, indent)
+    except pyson.DataParseError as e:
+        import traceback
+        return filename, None, None, f"PySON syntax error: {e}", traceback.format_exc()
+    except OSError as e:
+        import traceback
+        return filename, None, None, str(e), traceback.format_exc()
+    entry = None
+    if incremental:
+        entry = {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'hash': file_hash(filename), 'output': newname}
+    return filename, newname, entry, None, None
+
+def _stream_job(filename, out, allow_inf_nan, indent):
+    """ Like ``_convert_job``, but writes the JSON to ``out``, followed by a
+    newline. ``'-'`` is standard input.
+
+    With ``indent=None`` (NDJSON) the document is only written once all of it
+    has been converted, so a document with an error writes nothing and the
+    stream stays valid NDJSON. Otherwise the JSON is written while the input
+    is parsed, and a document with an error is cut off where the error is.
+    """
+    output = io.StringIO() if indent is None else out
+    try:
+        if filename == '-':
+            transcode(sys.stdin.buffer, output, allow_inf_nan, indent)
+        else:
+            with open(filename, 'rb') as file:
+                transcode(file, output, allow_inf_nan, indent)
+    except (pyson.DataParseError, OSError) as e:
+        import traceback
+        if output is out:
+            # Ends the line of the partial document.
+            out.write('\n')
+        error = f"PySON syntax error: {e}" if isinstance(e, pyson.DataParseError) else str(e)
+        return filename, None, None, error, traceback.format_exc()
+    if output is not out:
+        out.write(output.getvalue())
+    out.write('\n')
+    return filename, '<stdin>' if filename == '-' else filename, None, None, None
+
+def find_files(names, recursive, include, exclude):
+    """ Expands the ``FILE`` arguments: directories are searched (if
+    ``recursive``) for files whose name matches one of the ``include`` globs
+    and none of the ``exclude`` globs, which are matched against the name
+    and against the path relative to the directory. Subdirectories which
+    match an ``exclude`` glob are not searched.
+    """
+    def matches(name, relative, patterns):
+        return any(fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(relative, pattern) for pattern in patterns)
+
+    files = []
+    for name in names:
+        if name == '-':
+            files.append(name)
+        elif not path.isdir(name):
+            if not path.exists(name):
+                raise FileNotFoundError(f"file not found: {name}")
+            files.append(name)
+        elif not recursive:
+            raise IsADirectoryError(f"{name} is a directory (use -r to convert the files in it)")
+        else:
+            for root, dirs, filenames in os.walk(name):
+                dirs[:] = sorted(dirname for dirname in dirs if not matches(dirname, path.relpath(path.join(root, dirname), name).replace(os.sep, '/'), exclude))
+                for filename in sorted(filenames):
+                    relative = path.relpath(path.join(root, filename), name).replace(os.sep, '/')
+                    if matches(filename, relative, include) and not matches(filename, relative, exclude):
+                        files.append(path.join(root, filename))
+    return files
+
+def load_manifest(filename, options):
+    """ Returns the manifest's entries (source path -> size, mtime, hash and
+    output), or an empty dict if there is none or it was made with other
+    options.
+    """
+    try:
+        with open(filename, 'r', encoding='utf-8') as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict) or manifest.get('options') != options:
+        return {}
+    return manifest.get('files', {})
+
+def save_manifest(filename, options, files):
+    tempname = filename + '.tmp'
+    with open(tempname, 'w', encoding='utf-8') as file:
+        json.dump({'options': options, 'files': files}, file, indent=1, sort_keys=True)
+    os.replace(tempname, filename)
+
+def is_up_to_date(filename, entry):
+    """ Whether the output recorded in a manifest ``entry`` is still valid.
+    A file whose size and modification time are unchanged is not read; one
+    which was only touched is recognized by its hash.
+    """
+    if entry is None or not path.exists(entry['output']):
+        return False
+    stat = os.stat(filename)
+    if stat.st_size != entry['size']:
+        return False
+    if stat.st_mtime_ns == entry['mtime']:
+        return True
+    if file_hash(filename) == entry['hash']:
+        entry['mtime'] = stat.st_mtime_ns
+        return True
+    return False
 
 def main(args=None):
     """usage: pyson2json.py [-h] [-quiet] [--stop-on-error] [--print-traceback]
-                     [--allow-inf-nan]
+                     [--allow-inf-nan] [-j N] [-r] [--include GLOB]
+                     [--exclude GLOB] [--incremental] [--manifest FILE]
+                     [--stdout] [--ndjson]
                      FILE [FILE ...]
 
     Convert a PySON file to a JSON file
 
     positional arguments:
-      FILE               The files to convert
+      FILE               The files to convert, or directories (with -r); - is
+                         standard input, which is converted to standard output
 
     optional arguments:
       -h, --help         show this help message and exit
@@ -19,10 +297,28 @@ def main(args=None):
       --print-traceback  Print full traceback on error
       --allow-inf-nan    Allows Infinity and NaN as number literals (if this is
                          not present, they get turned into strings)
+      -j N, --jobs N     Convert N files at a time in separate processes
+      -r, --recursive    Convert the files in the given directories and their
+                         subdirectories
+      --include GLOB     Only convert files in directories which match GLOB
+                         (default: *.pyson); can be repeated
+      --exclude GLOB     Skip files and subdirectories in directories which
+                         match GLOB; can be repeated
+      --incremental      Skip files which have not changed since they were
+                         last converted, according to the manifest
+      --manifest FILE    The manifest used by --incremental (default:
+                         .pyson2json-manifest.json)
+      --stdout           Write the JSON to standard output, one document after
+                         the other, instead of to files (messages go to
+                         standard error; --jobs and --incremental are ignored);
+                         a document with an error is cut off where the error
+                         is
+      --ndjson           Write each document on a single line (NDJSON); a
+                         document with an error is left out
     """
     parser = argparse.ArgumentParser(description='Convert a PySON file to a JSON file')
-    parser.add_argument('files', metavar='FILE', type=argparse.FileType(mode='rb'), nargs='+',
-                        help='The files to convert')
+    parser.add_argument('files', metavar='FILE', nargs='+',
+                        help='The files to convert, or directories (with -r); - is standard input, which is converted to standard output')
     parser.add_argument('-quiet', action='store_true',
                         help="Don't print extra information while converting files")
     parser.add_argument('--stop-on-error', dest='stop_on_error', action='store_true',
@@ -31,67 +327,87 @@ def main(args=None):
                         help='Print full traceback on error')
     parser.add_argument('--allow-inf-nan', dest='allow_inf_nan', action='store_true',
                         help='Allows Infinity and NaN as number literals (if this is not present, they get turned into strings)')
+    parser.add_argument('-j', '--jobs', metavar='N', type=int, default=1,
+                        help='Convert N files at a time in separate processes')
+    parser.add_argument('-r', '--recursive', action='store_true',
+                        help='Convert the files in the given directories and their subdirectories')
+    parser.add_argument('--include', metavar='GLOB', action='append',
+                        help='Only convert files in directories which match GLOB (default: *.pyson); can be repeated')
+    parser.add_argument('--exclude', metavar='GLOB', action='append', default=[],
+                        help='Skip files and subdirectories in directories which match GLOB; can be repeated')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Skip files which have not changed since they were last converted, according to the manifest')
+    parser.add_argument('--manifest', metavar='FILE', default='.pyson2json-manifest.json',
+                        help='The manifest used by --incremental (default: .pyson2json-manifest.json)')
+    parser.add_argument('--stdout', action='store_true',
+                        help='Write the JSON to standard output, one document after the other, instead of to files (messages go to standard error; --jobs and --incremental are ignored); a document with an error is cut off where the error is')
+    parser.add_argument('--ndjson', action='store_true',
+                        help='Write each document on a single line (NDJSON); a document with an error is left out')
 
-    try:
-        args: argparse.Namespace = parser.parse_args(args)
-    except FileNotFoundError as e:
-        msg = str(e)
-        i = msg.find('No such file or directory:')
-        if i == -1:
-            print('ERROR:', msg)
-        else:
-            file = msg[i+27:]
-            print('ERROR: file not found:', file)
-        exit(1)
+    args: argparse.Namespace = parser.parse_args(args)
 
-    files: list = args.files
     verbose: bool = not args.quiet
     stop_on_error: bool = args.stop_on_error
     print_traceback: bool = args.print_traceback
     allow_inf_nan: bool = args.allow_inf_nan
+    jobs: int = max(1, args.jobs)
+    to_stdout: bool = args.stdout
+    incremental: bool = args.incremental and not to_stdout
+    indent = None if args.ndjson else 4
+    # Standard output is reserved for the JSON as soon as it is used.
+    log = sys.stderr if to_stdout or '-' in args.files else sys.stdout
 
-    for file in files:
-        filename: str = file.name
-        with file:
-            try:
-                data = pyson.load(file, allow_inf_nan)
-            except pyson.DataParseError as e:
-                print(f"ERROR parsing file {path.basename(filename)!r}:\nPySON syntax error: {e}")
-                if print_traceback:
-                    import traceback
-                    traceback.print_exc()
-                if stop_on_error:
-                    if verbose:
-                        print('Stopped process early')
-                    exit(1)
-                else:
-                    continue
-
-        i = filename.rfind('.')
-        if i == -1:
-            newname = filename + '.json'
-        else:
-            newname = filename[:i] + '.json'
+    try:
+        files = find_files(args.files, args.recursive, args.include or ['*.pyson'], args.exclude)
+    except OSError as e:
+        print('ERROR:', e, file=log)
+        exit(1)
 
-        def default(obj):
-            if isinstance(obj, (bytes, bytearray)):
-                return obj.decode('utf-8')
-            elif isinstance(obj, (tuple, set)):
-                return list(obj)
+    options = {'allow_inf_nan': allow_inf_nan, 'ndjson': args.ndjson}
+    manifest = {}
+    if incremental:
+        manifest = load_manifest(args.manifest, options)
+        todo = []
+        for filename in files:
+            if filename == '-':
+                todo.append(filename)
+                continue
+            key = path.abspath(filename)
+            if is_up_to_date(filename, manifest.get(key)):
+                if verbose:
+                    print("Up to date", path.basename(manifest[key]['output']), file=log)
             else:
-                return str(obj)
+                todo.append(filename)
+        files = todo
 
-        keys = [key for key in data if isinstance(key, bytes)]
+    def report(result):
+        """ Prints the result of one conversion; returns False to stop. """
+        filename, newname, entry, error, trace = result
+        if error is not None:
+            manifest.pop(path.abspath(filename), None)
+        elif entry is not None:
+            manifest[path.abspath(filename)] = entry
+        return report_result(filename, newname, error, trace, log, verbose, stop_on_error, print_traceback, 'parsing')
 
-        for key in keys:
-            data[key.decode('utf-8')] = data[key]
-            del data[key]
-
-        with open(newname, 'w') as file:
-            json.dump(data, file, indent=4, default=default)
-
-        if verbose:
-            print("Converted", path.basename(newname))
+    ok = True
+    out = ChunkWriter(sys.stdout.buffer)
+    try:
+        if to_stdout or '-' in files:
+            for filename in files:
+                if to_stdout or filename == '-':
+                    ok = report(_stream_job(filename, out, allow_inf_nan, indent))
+                    out.flush()
+                else:
+                    ok = report(_convert_job(filename, allow_inf_nan, incremental, indent))
+                if not ok:
+                    break
+        else:
+            ok = run_jobs(_convert_job, files, (allow_inf_nan, incremental, indent), jobs, report)
+    finally:
+        if incremental:
+            save_manifest(args.manifest, options, manifest)
+    if not ok:
+        exit(1)
 
 if __name__ == "__main__":
     main()
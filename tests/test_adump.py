@@ -0,0 +1,46 @@
+import asyncio
+import unittest
+
+import pyson
+
+
+class SlowWriter:
+    """ A StreamWriter stand-in whose reader takes a while to drain. """
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data):
+        self.size += len(data)
+
+    async def drain(self):
+        await asyncio.sleep(0.001)
+
+
+class AdumpCancelTest(unittest.IsolatedAsyncioTestCase):
+    async def test_round_trip(self):
+        obj = {'k%d' % i: {'a': list(range(20)), 'b': 'x'*30} for i in range(200)}
+        parts = []
+        writer = SlowWriter()
+        writer.write = parts.append
+        await pyson.adump(obj, writer, indent=4, high_water=4096)
+        self.assertEqual(b''.join(parts).decode('utf-8'), pyson.dumps(obj, indent=4))
+
+    async def test_cancel_stops_writing(self):
+        obj = {'k%d' % i: {'a': list(range(20)), 'b': 'x'*30} for i in range(5000)}
+        size = len(pyson.dumpb(obj, indent=4))
+        writer = SlowWriter()
+        task = asyncio.ensure_future(pyson.adump(obj, writer, indent=4, high_water=4096))
+        while writer.size == 0:
+            await asyncio.sleep(0.001)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertLess(writer.size, size)
+        size = writer.size
+        await asyncio.sleep(0.3)
+        self.assertEqual(writer.size, size)
+
+
+if __name__ == '__main__':
+    unittest.main()
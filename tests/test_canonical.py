@@ -0,0 +1,49 @@
+import unittest
+
+import pyson
+
+
+class CanonicalTest(unittest.TestCase):
+    def assertSameText(self, a, b):
+        self.assertEqual(pyson.canonical_dumps(a), pyson.canonical_dumps(b))
+        self.assertEqual(pyson.digest(a), pyson.digest(b))
+
+    def assertDifferentText(self, a, b):
+        self.assertNotEqual(pyson.canonical_dumps(a), pyson.canonical_dumps(b))
+        self.assertNotEqual(pyson.digest(a), pyson.digest(b))
+
+    def test_key_order(self):
+        self.assertSameText({'b': 1, 'a': 2, 3: 4}, {3: 4, 'a': 2, 'b': 1})
+        self.assertSameText({1: 'int', '1': 'str'}, {'1': 'str', 1: 'int'})
+        self.assertEqual(pyson.canonical_dumps({'b': 1, 'a': 2}), "{'a':2,'b':1}")
+
+    def test_negative_zero(self):
+        self.assertSameText({'x': -0.0}, {'x': 0.0})
+        self.assertSameText({'x': complex(-0.0, 1)}, {'x': complex(0.0, 1)})
+        self.assertSameText({-0.0: 1}, {0.0: 1})
+
+    def test_set_order(self):
+        self.assertSameText({'s': {'b', 'a', 3, 1.5}}, {'s': {1.5, 3, 'a', 'b'}})
+        self.assertSameText({'s': {(1, 2), 'x'}}, {'s': {'x', (1, 2)}})
+
+    def test_container_types(self):
+        self.assertDifferentText({'a': [1, 2]}, {'a': (1, 2)})
+        self.assertDifferentText({'a': [1, 2]}, {'a': {1, 2}})
+        self.assertDifferentText({'a': (1, 2)}, {'a': {1, 2}})
+        self.assertDifferentText({'a': [1]}, {'a': (1,)})
+        self.assertDifferentText({'a': []}, {'a': ()})
+        self.assertDifferentText({'a': set()}, {'a': {}})
+        self.assertDifferentText({'a': set()}, {'a': []})
+
+    def test_scalar_types(self):
+        self.assertDifferentText({'a': True}, {'a': 'True'})
+        self.assertDifferentText({'a': None}, {'a': 'null'})
+        self.assertDifferentText({'a': 1}, {'a': '1'})
+        self.assertDifferentText({1: 'v'}, {'1': 'v'})
+        self.assertDifferentText({'x': 'a\nb\nc\nd\n'}, {'x': 'a\nb\nc\nd'})
+        self.assertDifferentText({'x': 'a\r\nb\r\nc\r\nd'}, {'x': 'a\nb\nc\nd'})
+        self.assertSameText({'b': b'xy'}, {'b': bytearray(b'xy')})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import io
+import math
+import unittest
+
+import pyson
+
+
+class DumpLinesRoundTripTest(unittest.TestCase):
+    values = [
+        None,
+        True,
+        False,
+        'a\nb\nc\nd\n',
+        'a\r\nb\r\nc\r\nd',
+        b'x\ny\nz\nw\n',
+        {'text': 'one\ntwo\nthree\nfour', 'none': None, 'flag': False},
+        [None, 'null', 'None', 'True', 1.5, -math.inf],
+        '',
+        'plain',
+    ]
+
+    def round_trip(self, python_constants):
+        buffer = io.StringIO()
+        pyson.dump_lines(self.values, buffer, python_constants=python_constants)
+        text = buffer.getvalue()
+        self.assertEqual(text.count('\n'), len(self.values))
+        data = io.BytesIO(text.encode('utf-8'))
+        return list(pyson.iter_lines(data, python_constants=python_constants))
+
+    def test_default_constants(self):
+        self.assertEqual(self.round_trip(True), self.values)
+
+    def test_json_constants(self):
+        self.assertEqual(self.round_trip(False), self.values)
+
+    def test_defaults_match(self):
+        buffer = io.StringIO()
+        pyson.dump_lines([None, 'a\nb\nc\nd'], buffer)
+        data = io.BytesIO(buffer.getvalue().encode('utf-8'))
+        self.assertEqual(list(pyson.iter_lines(data)), [None, 'a\nb\nc\nd'])
+
+
+if __name__ == '__main__':
+    unittest.main()